@@ -0,0 +1,35 @@
+from __future__ import annotations
+import argparse
+import time
+from pathlib import Path
+
+from spade.io import read_csv
+from spade.stats import compute_input_stats
+from spade.vertical import build_vertical_db, read_spmf_vertical
+from spade.compiled import COMPILED_SUFFIX, compile_vdb, content_hash
+
+def main():
+    ap = argparse.ArgumentParser(description="Compile a dataset into a binary vertical DB for run_and_stat")
+    ap.add_argument("--input", required=True, help="Path to SPMF (.spmf/.spm) or CSV: sid,eid,items")
+    ap.add_argument("--out", required=False,
+                    help=f"Output file (default: input path with {COMPILED_SUFFIX})")
+    args = ap.parse_args()
+
+    t0 = time.perf_counter()
+    if args.input.endswith(".csv"):
+        records = read_csv(args.input)
+        st = compute_input_stats(records, filename=args.input)
+        vdb = build_vertical_db(records)
+        del records
+    elif args.input.endswith(".spmf") or args.input.endswith(".spm"):
+        vdb, st = read_spmf_vertical(args.input)
+    else:
+        raise ValueError("Unsupported input format")
+
+    out = args.out or str(Path(args.input).with_suffix(COMPILED_SUFFIX))
+    compile_vdb(vdb, st, content_hash(args.input), out)
+    print(f"Wrote {out} ({len(vdb)} items, {sum(len(tl) for tl in vdb.values())} keys) "
+          f"in {time.perf_counter() - t0:.2f}s")
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,8 @@
 from __future__ import annotations
 import argparse
-from spade.io import read_csv, read_spmf
+from spade.io import read_csv
 from spade.stats import compute_input_stats
+from spade.vertical import read_spmf_vertical
 
 def main():
     ap = argparse.ArgumentParser()
@@ -11,11 +12,11 @@ def main():
 
     if args.input.endswith(".csv"):
         records = read_csv(args.input)
+        st = compute_input_stats(records, filename=args.input)
     elif args.input.endswith(".spmf") or args.input.endswith(".spm"):
-        records = read_spmf(args.input)
+        _vdb, st = read_spmf_vertical(args.input)
     else:
         raise ValueError("Unsupported input format")
-    st = compute_input_stats(records, filename=args.input)
 
     lines = []
     lines.append(f"input_file: {st.filename}")
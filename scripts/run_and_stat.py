@@ -2,47 +2,149 @@ from __future__ import annotations
 import argparse
 import gc
 import time
+from contextlib import ExitStack
+from dataclasses import dataclass
 from pathlib import Path
+from typing import Iterable, List, Optional, Tuple
 
-from spade.io import read_csv, read_spmf
-from spade.stats import compute_input_stats
-from spade.vertical import build_vertical_db
+from spade.io import read_csv
+from spade.stats import InputStats, compute_input_stats
+from spade.vertical import build_vertical_db, read_spmf_vertical, read_spmf_projected, record_supports
 from spade.f1 import frequent_items
 from spade.node import Node
-from spade.pattern import format_pattern
+from spade.pattern import format_pattern, set_item_labels
+from spade.items import encode_items
+from spade.join import TIDLIST_ENGINES, set_exact_abandoned_len, set_join_engine
+from spade.tidlist import set_debug_checks, set_sid_weights
+from spade.dedup import dedup_sequences
+from spade.compiled import COMPILED_SUFFIX, load_vdb, source_hash
+from spade.bitmap import to_bitmap_db
+from spade.diffset import DIFFSET_THRESHOLD
+from spade.f2 import F2_METHODS, set_f2_method, set_pair_counts
+from spade.f2cache import cached_pair_counts
 
 from spade.dspade import dspade, StatsCounter
 from spade.bspade import bspade
 from spade.maxelts_dspade import maxelts_dspade
 from spade.maxelts_bspade import maxelts_bspade
 
+from spade.memory import PeakTracker
 from spade.stat_file import write_stat
-from spade.naming import dataset_info, build_out_name, build_stat_name
+from spade.sweep import SupSweep
+from spade.naming import DataInfo, dataset_info, build_out_name, build_stat_name
 
 
-def main():
-    ap = argparse.ArgumentParser()
-    ap.add_argument("--input", required=True)
-    ap.add_argument("--alg", required=True, choices=["dspade", "bspade", "maxelts-dspade", "maxelts-bspade"])
-    ap.add_argument("--sup", required=True, type=int)
-    ap.add_argument("--maxElts", required=False, type=int)
-    ap.add_argument("--resultsDir", required=True, help="Directory for OUT/STAT files")
+ALGS = ["dspade", "bspade", "maxelts-dspade", "maxelts-bspade"]
+MAXELTS_ALGS = ("maxelts-dspade", "maxelts-bspade")
+
+
+@dataclass
+class LoadedInput:
+    # vertical DB (dense item codes) shared by every run over one input
+    path: str
+    vdb: dict
+    input_stats: InputStats
+    info: DataInfo
+    distinct_sequences: Optional[int]
+    time_read_s: float
+    f2_cache: Optional[str] = None  # "hit" / "built" with --f2Cache
+
+
+def add_run_options(ap: argparse.ArgumentParser) -> None:
+    # options common to a single run and to the grid runners
     ap.add_argument("--gc", action="store_true", help="Force garbage collection at checkpoints (debug)")
+    ap.add_argument("--joinEngine", default="python", choices=TIDLIST_ENGINES,
+                    help="Tidlist join implementation (numpy requires NumPy)")
+    ap.add_argument("--exactJoinLen", action="store_true",
+                    help="Count abandoned joins with their full tidlist length instead of "
+                         "an upper bound (debug, rescans every abandoned join)")
+    ap.add_argument("--checkSorted", action="store_true",
+                    help="Verify the sorted-tidlist invariant on every join (debug, slow)")
+    ap.add_argument("--repr", default="tidlist", choices=["tidlist", "bitmap"],
+                    help="Vertical representation: sorted tidlists or SPAM-style bitmaps")
+    ap.add_argument("--diffsets", type=float, nargs="?", const=DIFFSET_THRESHOLD, default=None,
+                    metavar="THRESHOLD",
+                    help="dspade/bspade: store the children of a class member as diffsets when their average "
+                         f"tidlist shrink ratio is below THRESHOLD (default {DIFFSET_THRESHOLD})")
+    ap.add_argument("--f2", choices=F2_METHODS, default=None,
+                    help="F2 construction: horizontal pair count + joins of frequent pairs "
+                         "(default for tidlists) or a join per item pair (default for bitmaps)")
+    ap.add_argument("--workers", type=int, default=1,
+                    help="Build F2 in N processes (dspade: also the top-level equivalence classes)")
+    ap.add_argument("--project", action="store_true",
+                    help="Two-pass load: count item supports, then build tidlists of frequent items only")
+    ap.add_argument("--dedup", action="store_true",
+                    help="Collapse identical sequences into one weighted sid (same patterns and supports)")
+    ap.add_argument("--noCmap", action="store_true",
+                    help="Disable co-occurrence map pruning (join every candidate, as plain SPADE)")
+    ap.add_argument("--f2Cache", action="store_true",
+                    help="--f2 horizontal: read the item pair counts from a file next to the input "
+                         "(keyed by its content hash), counting and saving them on a miss")
 
-    args = ap.parse_args()
 
-    results_dir = Path(args.resultsDir)
-    results_dir.mkdir(parents=True, exist_ok=True)
+def check_run_options(ap: argparse.ArgumentParser, args: argparse.Namespace, algs: List[str]) -> None:
+    # validates the add_run_options flags for the algorithms to run, fills the --f2 default
+    if args.repr == "bitmap" and args.joinEngine != "python":
+        ap.error("--joinEngine applies to --repr tidlist only")
+    if args.diffsets is not None and (args.repr != "tidlist" or any(a not in ("dspade", "bspade") for a in algs)):
+        ap.error("--diffsets applies to --repr tidlist with --alg dspade/bspade only")
+    if args.dedup and args.repr != "tidlist":
+        ap.error("--dedup applies to --repr tidlist only")
+    if args.f2 is None:
+        args.f2 = "join" if args.repr == "bitmap" else "horizontal"
+    elif args.f2 == "horizontal" and args.repr == "bitmap":
+        ap.error("--f2 horizontal needs --repr tidlist")
+    if args.f2Cache and args.f2 != "horizontal":
+        ap.error("--f2Cache needs --f2 horizontal (and --repr tidlist)")
+
+
+def _join_engine(args: argparse.Namespace) -> str:
+    return "bitmap" if args.repr == "bitmap" else args.joinEngine
 
-    t0 = time.perf_counter()
 
-    # READ
+def load_input(args: argparse.Namespace, minsup: int) -> LoadedInput:
+    """
+    READ (+ vertical DB: the SPMF reader builds tidlists while streaming) and
+    sets the module-level engine/label/weight settings. With --project, only
+    items with support >= minsup are kept: pass the lowest sup of a grid.
+    """
+    set_join_engine(_join_engine(args))
+    set_exact_abandoned_len(args.exactJoinLen)
+    set_f2_method(args.f2)
+    set_debug_checks(args.checkSorted)
+
     t_read0 = time.perf_counter()
     if args.input.endswith(".csv"):
         records = read_csv(args.input)
+        input_stats = compute_input_stats(records, filename=args.input)
+        keep = None
+        if args.project:
+            keep = {it for it, sup in record_supports(records).items() if sup >= minsup}
+        vdb = build_vertical_db(records, keep=keep)
+        del records
+    elif args.input.endswith(COMPILED_SUFFIX):
+        # scripts/compile_dataset.py output: mapped, not parsed
+        vdb, input_stats = load_vdb(args.input, minsup=minsup if args.project else None)
+    elif args.project:
+        vdb, input_stats = read_spmf_projected(args.input, minsup=minsup)
     else:
-        records = read_spmf(args.input)
-    input_stats = compute_input_stats(records, filename=args.input)
+        vdb, input_stats = read_spmf_vertical(args.input)
+    distinct_sequences = None
+    if args.dedup:
+        vdb, weights = dedup_sequences(vdb)
+        set_sid_weights(weights)
+        distinct_sequences = len(weights) - 1
+    # the core works on dense int items; labels come back in format_pattern
+    vdb, labels = encode_items(vdb)
+    set_item_labels(labels)
+    f2_cache = None
+    set_pair_counts(None)
+    if args.f2Cache:
+        counts, hit = cached_pair_counts(vdb, labels, args.input, source_hash(args.input), args.dedup)
+        set_pair_counts(counts)
+        f2_cache = "hit" if hit else "built"
+    if args.repr == "bitmap":
+        vdb = to_bitmap_db(vdb)
     t_read1 = time.perf_counter()
 
     info = dataset_info(
@@ -51,28 +153,53 @@ def main():
         input_stats.num_transactions,
         input_stats.num_distinct_items,
     )
+    return LoadedInput(args.input, vdb, input_stats, info, distinct_sequences, t_read1 - t_read0, f2_cache)
+
+
+def run_config(
+    data: LoadedInput,
+    args: argparse.Namespace,
+    alg: str,
+    sup: int,
+    max_elts: Optional[int],
+    results_dir: Path,
+    shared_load: bool = False,
+    sweep_sups: Iterable[int] = (),
+) -> List[Tuple[Path, Path]]:
+    """
+    One mining run over a loaded input: writes its OUT and STAT files and
+    returns their paths. shared_load: the input was loaded once for several
+    runs, so this run's timings exclude the read (time_read_s is 0 and the
+    load time is reported as shared_load_s).
+    sweep_sups: higher sups whose OUT/STAT are derived from this run
+    (spade.sweep); their paths follow this run's, in ascending sup order.
+    """
+    if alg in MAXELTS_ALGS and max_elts is None:
+        raise ValueError("maxElts is required for maxelts variants")
+    if alg not in MAXELTS_ALGS:
+        max_elts = None
+    use_cmap = not args.noCmap
+    time_read_s = 0.0 if shared_load else data.time_read_s
+    sweep = SupSweep(s for s in set(sweep_sups) if s > sup)
+
+    t0 = time.perf_counter()
+    peak = PeakTracker()
 
     # PREP
-    vdb = build_vertical_db(records)
-    f1 = frequent_items(vdb, minsup=args.sup)
+    f1 = frequent_items(data.vdb, minsup=sup)
     item_tidlists = {it: tl for (it, tl, _) in f1}  # kept for API compatibility
-    f1_nodes = [Node(pattern=((it,),), tidlist=tl) for (it, tl, _) in f1]
+    f1_nodes = [Node(pattern=((it,),), tidlist=tl, sup=sup) for (it, tl, sup) in f1]
 
     if args.gc:
         gc.collect()
 
     # Resolve names early (so we can stream OUT during mining)
-    max_elts = None
-    if args.alg in ("maxelts-dspade", "maxelts-bspade"):
-        if args.maxElts is None:
-            raise ValueError("maxElts is required for maxelts variants")
-        max_elts = args.maxElts
-
-    out_name = build_out_name(args.alg, info, sup=args.sup, max_elts=max_elts)
-    stat_name = build_stat_name(args.alg, info, sup=args.sup, max_elts=max_elts)
-
-    out_path = results_dir / out_name
-    stat_path = results_dir / stat_name
+    paths = [
+        (results_dir / build_out_name(alg, data.info, sup=s, max_elts=max_elts),
+         results_dir / build_stat_name(alg, data.info, sup=s, max_elts=max_elts))
+        for s in [sup] + sweep.sups
+    ]
+    out_path, stat_path = paths[0]
 
     # MINE + stream OUT
     stats = StatsCounter()
@@ -80,68 +207,118 @@ def main():
 
 
     t_mine0 = time.perf_counter()
-    with open(out_path, "w", encoding="utf-8") as out_f:
+    with ExitStack() as files:
+        out_f = files.enter_context(open(out_path, "w", encoding="utf-8"))
+        sweep_f = {s: files.enter_context(open(p, "w", encoding="utf-8"))
+                   for s, (p, _) in zip(sweep.sups, paths[1:])}
         # CSV header only (clean OUT)
-        out_f.write("pattern_len,num_elts,tidlist_len,sup,pattern\n")
+        for f in [out_f, *sweep_f.values()]:
+            f.write("pattern_len,num_elts,tidlist_len,sup,pattern\n")
 
         def on_discover(n: Node):
-            out_f.write(f"{n.length},{n.elts},{n.len_tidlist},{n.sup},{format_pattern(n.pattern)}\n")
+            row = f"{n.length},{n.elts},{n.len_tidlist},{n.sup},{format_pattern(n.pattern)}\n"
+            out_f.write(row)
+            if sweep_f:
+                for s in sweep.add(n):
+                    sweep_f[s].write(row)
 
-        if args.alg == "dspade":
-            dspade(f1_nodes, item_tidlists, minsup=args.sup, on_discover=on_discover, stats=stats)
-        elif args.alg == "bspade":
-            bspade(f1_nodes, item_tidlists, minsup=args.sup, on_discover=on_discover, stats=stats)
-        elif args.alg == "maxelts-dspade":
+        if alg == "dspade":
+            dspade(f1_nodes, item_tidlists, minsup=sup, on_discover=on_discover, stats=stats,
+                   diffset_threshold=args.diffsets, workers=args.workers, use_cmap=use_cmap)
+        elif alg == "bspade":
+            bspade(f1_nodes, item_tidlists, minsup=sup, on_discover=on_discover, stats=stats,
+                   diffset_threshold=args.diffsets, workers=args.workers, use_cmap=use_cmap)
+        elif alg == "maxelts-dspade":
             maxelts_dspade(
                 f1_nodes, item_tidlists,
-                minsup=args.sup,
+                minsup=sup,
                 max_elts=max_elts,
                 on_discover=on_discover,
                 stats=stats,
+                workers=args.workers,
+                use_cmap=use_cmap,
             )
         else:  # maxelts-bspade
             maxelts_bspade(
                 f1_nodes, item_tidlists,
-                minsup=args.sup,
+                minsup=sup,
                 max_elts=max_elts,
                 on_discover=on_discover,
                 stats=stats,
+                workers=args.workers,
+                use_cmap=use_cmap,
             )
     t_mine1 = time.perf_counter()
 
-    # WRITE STAT
-    t_write0 = time.perf_counter()
-    total_time = time.perf_counter() - t0
-
-    write_stat(
-        path=str(stat_path),
-        input_stats=input_stats,
-        alg_name=args.alg,
-        sup=args.sup,
+    stat_kwargs = dict(
+        input_stats=data.input_stats,
+        alg_name=alg,
         max_elts=max_elts,
-        time_read_s=(t_read1 - t_read0),
-        time_mine_s=(t_mine1 - t_mine0),
-        time_write_s=0.0,  # we fill after measuring
-        total_time_s=0.0,  # we fill after measuring
-        stats_counter=stats,
+        time_read_s=time_read_s,
+        join_engine=_join_engine(args),
+        diffset_threshold=args.diffsets,
+        workers=args.workers,
+        f2_method=args.f2,
+        f2_cache=data.f2_cache,
+        exact_join_len=args.exactJoinLen,
+        cmap=use_cmap,
+        distinct_sequences=data.distinct_sequences,
+        projection=args.project,
+        shared_load_s=data.time_read_s if shared_load else None,
+        # derived STATs of a sweep share this run's peak (an upper bound of their own)
+        mine_peak_rss_bytes=peak.rise(),
     )
+    runs = [(sup, stat_path, stats, dict(time_mine_s=(t_mine1 - t_mine0)))]
+    for s, (_, p) in zip(sweep.sups, paths[1:]):
+        runs.append((s, p, sweep.stats[s],
+                     dict(time_mine_s=0.0, derived_from_sup=sup, sweep_mine_s=(t_mine1 - t_mine0))))
 
-    t_write1 = time.perf_counter()
-    total_time = time.perf_counter() - t0
+    for s, p, st, extra in runs:
+        # WRITE STAT
+        t_write0 = time.perf_counter()
+        write_stat(
+            path=str(p), sup=s, stats_counter=st,
+            time_write_s=0.0,  # we fill after measuring
+            total_time_s=0.0,  # we fill after measuring
+            **stat_kwargs, **extra,
+        )
 
-    # overwrite STAT with correct write/total times
-    write_stat(
-        path=str(stat_path),
-        input_stats=input_stats,
-        alg_name=args.alg,
-        sup=args.sup,
-        max_elts=max_elts,
-        time_read_s=(t_read1 - t_read0),
-        time_mine_s=(t_mine1 - t_mine0),
-        time_write_s=(t_write1 - t_write0),
-        total_time_s=total_time,
-        stats_counter=stats,
-    )
+        t_write1 = time.perf_counter()
+        if s == sup:
+            total_time = time_read_s + (time.perf_counter() - t0)
+        else:
+            total_time = time_read_s + (t_write1 - t_write0)
+
+        # overwrite STAT with correct write/total times
+        write_stat(
+            path=str(p), sup=s, stats_counter=st,
+            time_write_s=(t_write1 - t_write0),
+            total_time_s=total_time,
+            **stat_kwargs, **extra,
+        )
+    return paths
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--input", required=True,
+                    help=f"SPMF, CSV or compiled ({COMPILED_SUFFIX}, see scripts/compile_dataset.py) dataset")
+    ap.add_argument("--alg", required=True, choices=ALGS)
+    ap.add_argument("--sup", required=True, type=int)
+    ap.add_argument("--maxElts", required=False, type=int)
+    ap.add_argument("--resultsDir", required=True, help="Directory for OUT/STAT files")
+    add_run_options(ap)
+
+    args = ap.parse_args()
+    check_run_options(ap, args, [args.alg])
+    if args.alg in MAXELTS_ALGS and args.maxElts is None:
+        raise ValueError("maxElts is required for maxelts variants")
+
+    results_dir = Path(args.resultsDir)
+    results_dir.mkdir(parents=True, exist_ok=True)
+
+    data = load_input(args, minsup=args.sup)
+    [(out_path, stat_path)] = run_config(data, args, args.alg, args.sup, args.maxElts, results_dir)
 
     print(f"Wrote OUT:  {out_path}")
     print(f"Wrote STAT: {stat_path}")
@@ -1,6 +1,129 @@
 from __future__ import annotations
 import argparse
-import subprocess
+import gc
+import sys
+from pathlib import Path
+from typing import List
+
+from scripts.run_and_stat import add_run_options, check_run_options, load_input, run_config
+from spade.compiled import source_hash
+from spade.grid import GridConfig, estimate_cost, estimate_mem, run_configs, sweep_configs, unknown_mem
+from spade.naming import build_out_name, build_stat_name
+from spade.result_cache import MANIFEST_NAME, ResultCache, link_into, run_key
+
+
+def add_grid_options(ap: argparse.ArgumentParser) -> None:
+    add_run_options(ap)
+    ap.add_argument("--jobs", type=int, default=1,
+                    help="Run up to N configurations at once (forked processes sharing the loaded input)")
+    ap.add_argument("--memBudget", type=float, default=None, metavar="MB",
+                    help="Start a configuration only while the estimated peak memory of the running "
+                         "ones (from earlier STAT files in resultsDir, else a multiple of the input "
+                         "size) stays within MB")
+    ap.add_argument("--sweep", action="store_true",
+                    help="Mine each alg/maxElts once at the lowest sup and derive the OUT/STAT "
+                         "of the higher sups from it (attempted-type counters are n/a)")
+    ap.add_argument("--resultCache", default=None, metavar="PATH",
+                    help=f"Manifest of finished runs (default: resultsDir/{MANIFEST_NAME}); "
+                         "runs with the same input content and parameters are reused, not mined")
+    ap.add_argument("--noResultCache", action="store_true",
+                    help="Mine every configuration even if a cached result exists (still recorded)")
+
+
+# run options (add_run_options) that leave OUT and STAT contents alone
+_NOT_IN_RESULTS = ("gc", "checkSorted")
+
+
+def _cache_options(args: argparse.Namespace) -> dict:
+    # run options that change OUT or STAT contents (timings aside)
+    return {
+        "repr": args.repr, "joinEngine": args.joinEngine, "f2": args.f2,
+        "diffsets": args.diffsets, "cmap": not args.noCmap,
+        "dedup": args.dedup, "project": args.project, "workers": args.workers,
+        "exactJoinLen": args.exactJoinLen, "f2Cache": args.f2Cache,
+    }
+
+
+def run_grid_configs(ap: argparse.ArgumentParser, args: argparse.Namespace, configs: List[GridConfig]) -> None:
+    """
+    Reuses the cached results (spade.result_cache) of configurations that
+    already ran, then loads the input once (projected at the lowest sup) and
+    runs the others on it, most expensive first; exits with status 1 after
+    the last run if any configuration failed.
+    """
+    check_run_options(ap, args, sorted({c.alg for c in configs}))
+    if args.jobs < 1:
+        ap.error("--jobs must be >= 1")
+    if args.sweep and args.diffsets is not None:
+        # stored tidlist lengths depend on each run's diffset decisions
+        ap.error("--sweep cannot derive tidlist counters with --diffsets")
+    results_dir = Path(args.resultsDir)
+    results_dir.mkdir(parents=True, exist_ok=True)
+
+    # before reading the input: only its hash is needed
+    cache = ResultCache(Path(args.resultCache) if args.resultCache else results_dir / MANIFEST_NAME)
+    src = source_hash(args.input)
+    options = _cache_options(args)
+
+    def key(alg: str, sup: int, max_elts) -> str:
+        return run_key(src, alg, sup, max_elts, options)
+
+    todo = []
+    for c in configs:
+        # a sweep may reuse a derived result, a plain run needs a full STAT
+        hit = None if args.noResultCache else cache.lookup(key(c.alg, c.sup, c.max_elts), derived_ok=args.sweep)
+        if hit is None:
+            todo.append(c)
+            continue
+        print(f"Cached OUT:  {link_into(hit[0], results_dir)}")
+        print(f"Cached STAT: {link_into(hit[1], results_dir)}")
+    if not todo:
+        print(f"All {len(configs)} configurations cached")
+        return
+    configs = sweep_configs(todo) if args.sweep else todo
+
+    data = load_input(args, minsup=min(c.sup for c in configs))
+    # never write a run through a symlink to another directory's cached file
+    for c in configs:
+        for s in (c.sup,) + c.sweep:
+            for name in (build_out_name(c.alg, data.info, s, c.max_elts),
+                         build_stat_name(c.alg, data.info, s, c.max_elts)):
+                if (results_dir / name).is_symlink():
+                    (results_dir / name).unlink()
+    print(f"Loaded {args.input} in {data.time_read_s:.3f}s (shared by {len(configs)} runs)")
+    costs = {c: estimate_cost(results_dir, data.info, c) for c in configs}
+
+    def run(c: GridConfig) -> None:
+        for out_path, stat_path in run_config(data, args, c.alg, c.sup, c.max_elts, results_dir,
+                                              shared_load=True, sweep_sups=c.sweep):
+            print(f"Wrote OUT:  {out_path}")
+            print(f"Wrote STAT: {stat_path}")
+        gc.collect()
+
+    mem_budget = None if args.memBudget is None else int(args.memBudget * 1024 * 1024)
+    mems = {c: estimate_mem(results_dir, data.info, c) for c in configs}
+    default_mem = unknown_mem(sum(tl.nbytes() for tl in data.vdb.values()))
+    failed = run_configs(configs, run, jobs=args.jobs, mem_budget=mem_budget, costs=costs,
+                         mems=mems, default_mem=default_mem)
+
+    for c in configs:
+        if c in failed:
+            continue
+        for s in (c.sup,) + c.sweep:
+            cache.record(
+                key(c.alg, s, c.max_elts),
+                results_dir / build_out_name(c.alg, data.info, s, c.max_elts),
+                results_dir / build_stat_name(c.alg, data.info, s, c.max_elts),
+                derived=(s != c.sup),
+            )
+    cache.save()
+
+    if failed:
+        print(f"{len(failed)} of {len(configs)} configurations failed:", file=sys.stderr)
+        for c in failed:
+            print(f"  {c}", file=sys.stderr)
+        sys.exit(1)
+
 
 def main():
     ap = argparse.ArgumentParser()
@@ -8,41 +131,24 @@ def main():
     ap.add_argument("--resultsDir", required=True)
     ap.add_argument("--sups", required=True, help="Comma-separated, e.g. 2,3,4")
     ap.add_argument("--maxElts", required=False, help="Comma-separated, e.g. 2,3,4 (only for maxelts algs)")
-    ap.add_argument("--gc", action="store_true", help="Enable GC checkpoints in run_and_stat")
+    add_grid_options(ap)
     args = ap.parse_args()
 
     sups = [int(x.strip()) for x in args.sups.split(",") if x.strip()]
     max_elts_list = [int(x.strip()) for x in args.maxElts.split(",") if x.strip()] if args.maxElts else []
 
+    configs = []
     for sup in sups:
         # dspade, bspade
         for alg in ["dspade", "bspade"]:
-            cmd = [
-                "python", "-m", "scripts.run_and_stat",
-                "--input", args.input,
-                "--alg", alg,
-                "--sup", str(sup),
-                "--resultsDir", args.resultsDir,
-            ]
-            if args.gc:
-                cmd.append("--gc")
-            subprocess.check_call(cmd)
+            configs.append(GridConfig(alg, sup))
 
         # maxelts variants
-        if max_elts_list:
-            for alg in ["maxelts-dspade", "maxelts-bspade"]:
-                for e in max_elts_list:
-                    cmd = [
-                        "python", "-m", "scripts.run_and_stat",
-                        "--input", args.input,
-                        "--alg", alg,
-                        "--sup", str(sup),
-                        "--maxElts", str(e),
-                        "--resultsDir", args.resultsDir,
-                    ]
-                    if args.gc:
-                        cmd.append("--gc")
-                    subprocess.check_call(cmd)
+        for alg in ["maxelts-dspade", "maxelts-bspade"]:
+            for e in max_elts_list:
+                configs.append(GridConfig(alg, sup, e))
+
+    run_grid_configs(ap, args, configs)
 
 if __name__ == "__main__":
     main()
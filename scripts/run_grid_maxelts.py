@@ -1,6 +1,9 @@
 from __future__ import annotations
 import argparse
-import subprocess
+
+from scripts.run_grid import add_grid_options, run_grid_configs
+from spade.grid import GridConfig
+
 
 def main():
     ap = argparse.ArgumentParser()
@@ -8,26 +11,19 @@ def main():
     ap.add_argument("--resultsDir", required=True)
     ap.add_argument("--sups", required=True, help="Comma-separated, e.g. 200,300,400")
     ap.add_argument("--maxElts", required=True, help="Comma-separated, e.g. 2,3")
-    ap.add_argument("--gc", action="store_true", help="Enable GC checkpoints in run_and_stat")
+    add_grid_options(ap)
     args = ap.parse_args()
 
     sups = [int(x.strip()) for x in args.sups.split(",") if x.strip()]
     max_elts_list = [int(x.strip()) for x in args.maxElts.split(",") if x.strip()]
 
+    configs = []
     for sup in sups:
         for e in max_elts_list:
             for alg in ["maxelts-dspade", "maxelts-bspade"]:
-                cmd = [
-                    "python", "-m", "scripts.run_and_stat",
-                    "--input", args.input,
-                    "--alg", alg,
-                    "--sup", str(sup),
-                    "--maxElts", str(e),
-                    "--resultsDir", args.resultsDir,
-                ]
-                if args.gc:
-                    cmd.append("--gc")
-                subprocess.check_call(cmd)
+                configs.append(GridConfig(alg, sup, e))
+
+    run_grid_configs(ap, args, configs)
 
 if __name__ == "__main__":
     main()
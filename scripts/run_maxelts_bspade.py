@@ -24,7 +24,7 @@ def main():
     f1 = frequent_items(vdb, minsup=args.sup)
 
     item_tidlists = {it: tl for (it, tl, _) in f1}  # kept for API compatibility
-    f1_nodes = [Node(pattern=((it,),), tidlist=tl) for (it, tl, _) in f1]
+    f1_nodes = [Node(pattern=((it,),), tidlist=tl, sup=sup) for (it, tl, sup) in f1]
 
     stats = StatsCounter()
     lines: list[str] = []
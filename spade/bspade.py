@@ -2,15 +2,18 @@ from __future__ import annotations
 from typing import Dict, List, Tuple, Callable
 from collections import defaultdict
 
-from .node import Node
-from .vertical import Tid
-from .pattern import Pattern
+from .node import Node, by_sort_key
+from .tidlist import Tidlist
+from .pattern import Pattern, Item
 from .pattern_utils import split_last_step, pattern_sort_key
-from .candidates import join_in_class
+from .candidates import join_class
 from .dspade import StatsCounter
 from .f2 import gen_f2
+from .cmap import CoocMap
+from . import diffset
 
 import gc
+import heapq
 
 
 def _group_by_prefix(nodes: List[Node]) -> Dict[Pattern, List[Node]]:
@@ -20,79 +23,97 @@ def _group_by_prefix(nodes: List[Node]) -> Dict[Pattern, List[Node]]:
         classes[pref].append(n)
 
     for pref in list(classes.keys()):
-        classes[pref] = sorted(classes[pref], key=lambda x: pattern_sort_key(x.pattern))
+        classes[pref] = sorted(classes[pref], key=by_sort_key)
 
     return dict(sorted(classes.items(), key=lambda kv: pattern_sort_key(kv[0])))
 
 
-def _f1_nodes_to_f2_nodes(f1_nodes: List[Node], minsup: int, stats: StatsCounter | None = None) -> List[Node]:
-    f1_tuples: List[Tuple[str, List[Tid], int]] = []
+def _f1_nodes_to_f2_nodes(
+    f1_nodes: List[Node], minsup: int, stats: StatsCounter | None = None, workers: int = 1
+) -> List[Node]:
+    f1_tuples: List[Tuple[Item, Tidlist, int]] = []
     for n in sorted(f1_nodes, key=lambda x: x.pattern[0][0]):
         item = n.pattern[0][0]
         f1_tuples.append((item, n.tidlist, n.sup))
-    f2 = gen_f2(f1_tuples, minsup, stats=stats)
-    return [Node(pattern=p, tidlist=tl) for (p, tl, _sup) in f2]
+    f2 = gen_f2(f1_tuples, minsup, stats=stats, workers=workers)
+    return [Node(pattern=p, tidlist=tl, sup=sup) for (p, tl, sup) in f2]
 
 
 def bspade(
     f1_nodes: List[Node],
-    item_tidlists: Dict[str, List[Tid]],
+    item_tidlists: Dict[Item, Tidlist],
     minsup: int,
     on_discover: Callable[[Node], None] | None = None,
     stats: StatsCounter | None = None,
+    diffset_threshold: float | None = None,
+    workers: int = 1,
+    use_cmap: bool = False,
 ) -> List[Node]:
     """
     SPADE-like BFS (bSPADE): level-wise over equivalence classes.
     API unchanged: takes f1_nodes + item_tidlists, but internally uses SPADE joins.
+    diffset_threshold: as in dspade; the lookups cached on a level's diffsets
+    are dropped once the level below the next one is joined.
+    workers > 1: F2 is built in a process pool (see gen_f2).
+    use_cmap: co-occurrence pruning before the joins, as in dspade.
     """
     discovered: List[Node] = []
 
     # record F1
-    for n in sorted(f1_nodes, key=lambda x: pattern_sort_key(x.pattern)):
+    for n in sorted(f1_nodes, key=by_sort_key):
         if stats:
-            stats.add_attempted(n.length, n.len_tidlist)
+            stats.add_attempted(n.length, n.stored_len)
             stats.add_candidate(n)
         discovered.append(n)
         if on_discover: on_discover(n)
         if stats: stats.add_discovered(n)
 
     # build & record F2
-    f2_nodes = _f1_nodes_to_f2_nodes(f1_nodes, minsup, stats=stats)
-    for n in sorted(f2_nodes, key=lambda x: pattern_sort_key(x.pattern)):
+    f2_nodes = _f1_nodes_to_f2_nodes(f1_nodes, minsup, stats=stats, workers=workers)
+    for n in sorted(f2_nodes, key=by_sort_key):
         if stats: stats.add_candidate(n)
         discovered.append(n)
         if on_discover: on_discover(n)
         if stats: stats.add_discovered(n)
 
+    cmap = CoocMap.from_f2(f2_nodes) if use_cmap else None
+    diffsets = None
+    if diffset_threshold is not None:
+        diffsets = diffset.Diffsets(diffset_threshold, item_tidlists.values())
+
     # BFS levels: start from classes of F2
-    current_classes = _group_by_prefix(f2_nodes)
+    current_classes = list(_group_by_prefix(f2_nodes).values())
+    prev_level_nodes: List[Node] = []
 
     while current_classes:
-        next_level_nodes: List[Node] = []
-
-        # For each class, generate candidates by pairwise joins
-        for _pref, cls_nodes in current_classes.items():
-            for i in range(len(cls_nodes)):
-                for j in range(i + 1, len(cls_nodes)):
-                    cand = join_in_class(cls_nodes[i], cls_nodes[j], minsup, stats=stats)
-                    if stats:
-                        for c in cand:
-                            stats.add_candidate(c)
-                    next_level_nodes.extend(cand)
-
-        if not next_level_nodes:
+        # (parent, children) for every non-empty class of the next level
+        next_classes: List[Tuple[Node, List[Node]]] = []
+
+        # For each class, generate candidates by pairwise joins; join_class
+        # already splits them into the classes below each member
+        for cls_nodes in current_classes:
+            buckets = join_class(cls_nodes, minsup, stats=stats, cmap=cmap, diffsets=diffsets)
+            for parent, bucket in zip(cls_nodes, buckets):
+                if stats:
+                    for c in bucket:
+                        stats.add_candidate(c)
+                if bucket:
+                    next_classes.append((parent, bucket))
+
+        if diffsets is not None:
+            diffset.release(prev_level_nodes)
+            prev_level_nodes = [n for cls_nodes in current_classes for n in cls_nodes]
+
+        if not next_classes:
             break
 
-        # discover all nodes on this level
-        next_level_nodes = sorted(next_level_nodes, key=lambda x: pattern_sort_key(x.pattern))
-        # optional dedup by pattern across classes
-        uniq = {}
-        for n in next_level_nodes:
-            if n.pattern not in uniq:
-                uniq[n.pattern] = n
-        next_level_nodes = [uniq[p] for p in sorted(uniq.keys(), key=pattern_sort_key)]
+        # classes in the order of their prefixes (= parents); a pattern has a
+        # single prefix, so no node is in two classes
+        next_classes.sort(key=lambda pc: pc[0].sort_key)
+        current_classes = [bucket for _, bucket in next_classes]
 
-        for n in next_level_nodes:
+        # discover all nodes on this level: merge of the sorted classes
+        for n in heapq.merge(*current_classes, key=by_sort_key):
             discovered.append(n)
             if on_discover:
                 on_discover(n)
@@ -103,7 +124,6 @@ def bspade(
         if stats is not None and getattr(stats, "gc_enabled", False):
             gc.collect()
 
-        # group to next classes
-        current_classes = _group_by_prefix(next_level_nodes)
-
+    if diffsets is not None:
+        diffset.release(prev_level_nodes)
     return discovered
@@ -1,37 +1,62 @@
 from __future__ import annotations
-from typing import List, Dict
-from .node import Node
+from typing import List, Dict, Tuple
+from .node import Node, by_sort_key
 from .pattern import Pattern
-from .pattern_utils import split_last_step, pattern_sort_key
-from .join import i_join, s_join
+from .pattern_utils import split_last_step
+from . import join
+from . import diffset
 
+A, B = 0, 1  # side of a joined pair
 
-def join_in_class(a: Node, b: Node, minsup: int, stats=None) -> List[Node]:
+
+def _join_pair(
+    a: Node, b: Node, minsup: int, stats=None, cmap=None, max_elts=None
+) -> List[Tuple[Node, int]]:
     """
-    Join two nodes that MUST belong to the same equivalence class (same prefix).
-    Generates (k+1)-candidates according to SPADE cases:
-      I+I -> I
-      I+S -> S
-      S+S -> {event, seq_ab, seq_ba}
+    Frequent children of (a, b) as (node, parent): parent (A or B) is the side
+    whose pattern is the child's prefix, i.e. the child's equivalence class.
+    Members of a diffset class (spade.diffset) are joined on their diffs.
+    cmap (spade.cmap.CoocMap): candidates whose last two atoms are not a
+    frequent 2-pattern are counted as pruned and never joined.
+    max_elts: every child has one item more than a (and b), so a pair whose
+    children would exceed it is not joined at all (and not attempted).
     """
     pa, ta, xa = split_last_step(a.pattern)
     pb, tb, xb = split_last_step(b.pattern)
     if pa != pb:
         return []
+    if max_elts is not None and a.elts >= max_elts:
+        return []
 
-    out: List[Node] = []
+    out: List[Tuple[Node, int]] = []
+    diffs = isinstance(a.tidlist, diffset.DiffTidlist)
+    s_join_minsup = diffset.s_join_minsup if diffs else join.s_join_minsup
 
-    def emit(pat: Pattern, tl):
-        # attempted candidate (before minsup)
+    def i_join_minsup(parent: int):
+        if diffs:
+            # a diffset child is stored against its parent
+            if parent == A:
+                return diffset.i_join_minsup(a.tidlist, b.tidlist, minsup)
+            return diffset.i_join_minsup(b.tidlist, a.tidlist, minsup)
+        return join.i_join_minsup(a.tidlist, b.tidlist, minsup)
+
+    def emit(pat: Pattern, tl, parent: int, base, step: str, first):
+        # attempted candidate (before minsup); tl is the step join of first with base
         if stats is not None:
             # length is number of events in pattern
             k = len(pat)
-            stats.add_attempted(k, len(tl))
+            if tl is join.INFREQUENT:
+                stats.add_abandoned(k, join.abandoned_len(step, first, base))
+            else:
+                stats.add_attempted(k, len(tl), tl.stored_len)
+
+        # *_minsup joins only return tidlists with sup >= minsup
+        if tl is not join.INFREQUENT:
+            out.append((Node(pattern=pat, tidlist=tl), parent))
 
-        # avoid extra work: compute sup via Node.sup property
-        n = Node(pattern=pat, tidlist=tl)
-        if n.sup >= minsup:
-            out.append(n)
+    def pruned(pat: Pattern) -> None:
+        if stats is not None:
+            stats.add_pruned_cmap(len(pat))
 
     # I + I -> I (event atom)
     if ta == "I" and tb == "I":
@@ -39,42 +64,106 @@ def join_in_class(a: Node, b: Node, minsup: int, stats=None) -> List[Node]:
         last_ev = a.pattern[-1]
         new_ev = tuple(sorted(set(last_ev + (xb,))))
         pat = a.pattern[:-1] + (new_ev,)
-        tl = i_join(a.tidlist, b.tidlist)
-        emit(pat, tl)
+        if cmap is not None and not cmap.has_i(xa, xb):
+            pruned(pat)
+            return out
+        # the larger atom ends the event: the child extends the other side
+        parent = A if xb > xa else B
+        emit(pat, i_join_minsup(parent), parent, b.tidlist, "I", a.tidlist)
 
     # I + S -> S
     elif ta == "I" and tb == "S":
         pat = a.pattern + ((xb,),)
-        tl = s_join(a.tidlist, b.tidlist)
-        emit(pat, tl)
+        if cmap is not None and not cmap.has_s(xa, xb):
+            pruned(pat)
+            return out
+        tl = s_join_minsup(a.tidlist, b.tidlist, minsup)
+        emit(pat, tl, A, b.tidlist, "S", a.tidlist)
 
     elif ta == "S" and tb == "I":
         pat = b.pattern + ((xa,),)
-        tl = s_join(b.tidlist, a.tidlist)
-        emit(pat, tl)
+        if cmap is not None and not cmap.has_s(xb, xa):
+            pruned(pat)
+            return out
+        tl = s_join_minsup(b.tidlist, a.tidlist, minsup)
+        emit(pat, tl, B, a.tidlist, "S", b.tidlist)
 
     # S + S -> 3 candidates
     else:
         # event: prefix -> (xa xb)
         ev = tuple(sorted((xa, xb)))
         pat_event = pa + (ev,)
-        tl_event = i_join(a.tidlist, b.tidlist)
-        emit(pat_event, tl_event)
+        if cmap is not None and not cmap.has_i(xa, xb):
+            pruned(pat_event)
+        else:
+            parent = A if xb > xa else B
+            emit(pat_event, i_join_minsup(parent), parent, b.tidlist, "I", a.tidlist)
 
         # seq: prefix -> xa -> xb
         pat_ab = a.pattern + ((xb,),)
-        tl_ab = s_join(a.tidlist, b.tidlist)
-        emit(pat_ab, tl_ab)
+        if cmap is not None and not cmap.has_s(xa, xb):
+            pruned(pat_ab)
+        else:
+            tl_ab = s_join_minsup(a.tidlist, b.tidlist, minsup)
+            emit(pat_ab, tl_ab, A, b.tidlist, "S", a.tidlist)
 
         # seq: prefix -> xb -> xa
         pat_ba = b.pattern + ((xa,),)
-        tl_ba = s_join(b.tidlist, a.tidlist)
-        emit(pat_ba, tl_ba)
+        if cmap is not None and not cmap.has_s(xb, xa):
+            pruned(pat_ba)
+        else:
+            tl_ba = s_join_minsup(b.tidlist, a.tidlist, minsup)
+            emit(pat_ba, tl_ba, B, a.tidlist, "S", b.tidlist)
 
+    return out
+
+
+def join_in_class(a: Node, b: Node, minsup: int, stats=None, cmap=None, max_elts=None) -> List[Node]:
+    """
+    Join two nodes that MUST belong to the same equivalence class (same prefix).
+    Generates (k+1)-candidates according to SPADE cases:
+      I+I -> I
+      I+S -> S
+      S+S -> {event, seq_ab, seq_ba}
+    """
     # Deduplicate by pattern (can happen from different pairs)
     unique: Dict[Pattern, Node] = {}
-    for n in out:
+    for n, _ in _join_pair(a, b, minsup, stats, cmap, max_elts):
         if n.pattern not in unique:
             unique[n.pattern] = n
 
-    return [unique[p] for p in sorted(unique.keys(), key=pattern_sort_key)]
+    return sorted(unique.values(), key=by_sort_key)
+
+
+def join_class(
+    class_nodes: List[Node], minsup: int, stats=None, cmap=None, max_elts=None, diffsets=None
+) -> List[List[Node]]:
+    """
+    All pairwise joins of one equivalence class (members sorted by sort key).
+    The class of a child is the member its pattern extends, so children go
+    straight into one bucket per member: buckets[k] is the next equivalence
+    class below class_nodes[k], sorted by sort key (possibly empty).
+    diffsets (spade.diffset.Diffsets): the buckets may switch to diffsets.
+    The s_join indexes of the members are released once the class is joined.
+    A pattern has a single prefix, so no child appears twice.
+    """
+    buckets: List[List[Node]] = [[] for _ in class_nodes]
+    if max_elts is not None and class_nodes and class_nodes[0].elts >= max_elts:
+        # members share their item count: no child fits, nothing is joined
+        return [[] for _ in class_nodes]
+    for i in range(len(class_nodes)):
+        for j in range(i + 1, len(class_nodes)):
+            for n, parent in _join_pair(class_nodes[i], class_nodes[j], minsup, stats, cmap):
+                buckets[i if parent == A else j].append(n)
+
+    for children in buckets:
+        children.sort(key=by_sort_key)
+    if diffsets is not None:
+        # reads the first-key indexes of plain members
+        buckets = diffsets.convert(class_nodes, buckets)
+
+    # members are not joined again (their children form the next classes):
+    # drop the first-key indexes s_join cached on them
+    for n in class_nodes:
+        n.tidlist.release_first()
+    return buckets
@@ -0,0 +1,43 @@
+"""
+CM-SPADE co-occurrence map: the frequent 2-patterns, used to prune candidates
+before any tidlist is touched.
+
+Every candidate of join_in_class(a, b) ends with the last atoms xa, xb of its
+two parents, as an I-pair <{xa,xb}> (I+I, S+S event) or an S-pair
+<{xa}->{xb}> / <{xb}->{xa}> (the sequence cases). That 2-pattern is a
+subsequence of the candidate, so if it is not in F2 the candidate cannot be
+frequent (anti-monotonicity) and its join is skipped.
+"""
+from __future__ import annotations
+from typing import FrozenSet, Iterable, Tuple
+
+from .node import Node
+from .pattern import Item
+
+Pair = Tuple[Item, Item]
+
+
+class CoocMap:
+    __slots__ = ("i_pairs", "s_pairs")
+
+    def __init__(self, i_pairs: FrozenSet[Pair], s_pairs: FrozenSet[Pair]):
+        self.i_pairs = i_pairs  # (x, y), x < y: <{x,y}> is frequent
+        self.s_pairs = s_pairs  # (x, y): <{x}->{y}> is frequent
+
+    @classmethod
+    def from_f2(cls, f2_nodes: Iterable[Node]) -> CoocMap:
+        i_pairs = set()
+        s_pairs = set()
+        for n in f2_nodes:
+            p = n.pattern
+            if len(p) == 1:
+                i_pairs.add(p[0])
+            else:
+                s_pairs.add((p[0][0], p[1][0]))
+        return cls(frozenset(i_pairs), frozenset(s_pairs))
+
+    def has_i(self, x: Item, y: Item) -> bool:
+        return ((x, y) if x < y else (y, x)) in self.i_pairs
+
+    def has_s(self, x: Item, y: Item) -> bool:
+        return (x, y) in self.s_pairs
@@ -0,0 +1,118 @@
+"""
+Compiled (binary, columnar) vertical DB files.
+
+Parsing a large SPMF file dominates short runs, and every run of a grid
+parses the same text again. compile_vdb writes the vertical DB once:
+
+    magic "SPADEVDB" | version u32 | 0 u32 | meta length u64 | meta (JSON)
+    | padding to 8 bytes | offsets int64[I+1] | keys int64[offsets[I]]
+
+meta holds the item labels (the item dictionary), their supports, the
+InputStats of the source and the SHA-256 of the source file. Item i owns
+keys[offsets[i]:offsets[i+1]], its packed sid<<32|eid tidlist in native
+byte order. load_vdb maps the file and hands out Tidlists whose keys are
+memoryviews into the mapping: nothing is parsed or copied.
+"""
+from __future__ import annotations
+import hashlib
+import json
+import mmap
+import struct
+import sys
+from array import array
+from dataclasses import asdict
+from typing import Optional, Tuple
+
+from .stats import InputStats
+from .tidlist import Tidlist
+from .vertical import VerticalDB, support
+
+COMPILED_SUFFIX = ".vdb"
+
+_MAGIC = b"SPADEVDB"
+_VERSION = 1
+_HEADER = struct.Struct("<8sIIQ")  # magic, version, reserved, meta length
+
+
+def content_hash(path: str) -> str:
+    # SHA-256 of a file's bytes (identifies a dataset across renames / copies)
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def source_hash(path: str) -> str:
+    # content hash of a dataset; a compiled file stands for its source
+    if path.endswith(COMPILED_SUFFIX):
+        return read_vdb_meta(path)["source_sha256"]
+    return content_hash(path)
+
+
+def compile_vdb(vdb: VerticalDB, input_stats: InputStats, source_hash: str, out_path: str) -> None:
+    labels = sorted(vdb)
+    offsets = array("q", [0])
+    for it in labels:
+        offsets.append(offsets[-1] + len(vdb[it]))
+    meta = json.dumps({
+        "byteorder": sys.byteorder,
+        "source_sha256": source_hash,
+        "input_stats": asdict(input_stats),
+        "items": labels,
+        "supports": [support(vdb[it]) for it in labels],
+    }).encode("utf-8")
+
+    with open(out_path, "wb") as f:
+        f.write(_HEADER.pack(_MAGIC, _VERSION, 0, len(meta)))
+        f.write(meta)
+        f.write(b"\0" * (-(_HEADER.size + len(meta)) % 8))
+        offsets.tofile(f)
+        for it in labels:
+            keys = vdb[it].keys
+            if not isinstance(keys, array):
+                keys = array("q", keys)
+            keys.tofile(f)
+
+
+def read_vdb_meta(path: str) -> dict:
+    # header and metadata only (e.g. the source hash), no mapping
+    with open(path, "rb") as f:
+        magic, version, _, meta_len = _HEADER.unpack(f.read(_HEADER.size))
+        _check(path, magic, version)
+        return json.loads(f.read(meta_len))
+
+
+def load_vdb(path: str, minsup: Optional[int] = None) -> Tuple[VerticalDB, InputStats]:
+    """
+    Maps a compiled file read-only. Tidlists are zero-copy views with their
+    stored support; with minsup, infrequent items are not even exposed.
+    """
+    with open(path, "rb") as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    magic, version, _, meta_len = _HEADER.unpack_from(mm, 0)
+    _check(path, magic, version)
+    meta = json.loads(mm[_HEADER.size:_HEADER.size + meta_len])
+    if meta["byteorder"] != sys.byteorder:
+        raise ValueError(f"{path} was compiled on a {meta['byteorder']}-endian machine")
+
+    labels = meta["items"]
+    start = _HEADER.size + meta_len
+    start += -start % 8
+    words = memoryview(mm)[start:].cast("q")  # the mapping stays open while views exist
+    offsets = words[:len(labels) + 1]
+    base = len(labels) + 1
+
+    vdb: VerticalDB = {}
+    for i, (it, sup) in enumerate(zip(labels, meta["supports"])):
+        if minsup is not None and sup < minsup:
+            continue
+        vdb[it] = Tidlist(words[base + offsets[i]:base + offsets[i + 1]], sup=sup)
+    return vdb, InputStats(**meta["input_stats"])
+
+
+def _check(path: str, magic: bytes, version: int) -> None:
+    if magic != _MAGIC:
+        raise ValueError(f"{path} is not a compiled SPADE dataset")
+    if version != _VERSION:
+        raise ValueError(f"{path}: unsupported compiled format version {version}")
@@ -0,0 +1,63 @@
+"""
+Weighted deduplication of identical sequences.
+
+Click-stream data repeats the same sequences many times (bike has 96 copies
+of <{3030}->{3014}>). Every copy adds the same keys to the same tidlists, so
+dedup_sequences keeps one sid per distinct sequence and records how many
+input sequences it stands for. Supports then sum sid weights
+(spade.tidlist.set_sid_weights), so patterns and supports are unchanged while
+tidlists and joins shrink by the duplication ratio.
+"""
+from __future__ import annotations
+from array import array
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+from .tidlist import Tidlist, EID_BITS, EID_MASK
+from .vertical import VerticalDB
+
+
+def dedup_sequences(vdb: VerticalDB) -> Tuple[VerticalDB, array]:
+    """
+    Returns the vertical DB of the distinct sequences and their weights
+    (weights[sid] = multiplicity, weights[0] unused). Sequences are compared
+    as lists of events, so eid gaps do not matter; distinct sequences are
+    renumbered 1..m in order of first occurrence, with eids 1..n.
+    """
+    events: Dict[int, List[Tuple[int, object]]] = defaultdict(list)  # sid -> (eid, item)
+    for it, tl in vdb.items():
+        for k in tl.keys:
+            events[k >> EID_BITS].append((k & EID_MASK, it))
+
+    sid_of: Dict[tuple, int] = {}
+    weights = array("q", [0])
+    cols: Dict[object, array] = {}
+    for sid in sorted(events):
+        seq = events.pop(sid)
+        seq.sort()
+        grouped: List[tuple] = []
+        last_eid = -1
+        for eid, it in seq:
+            if eid != last_eid:
+                grouped.append([])
+                last_eid = eid
+            grouped[-1].append(it)
+        key = tuple(map(tuple, grouped))
+
+        new_sid = sid_of.get(key)
+        if new_sid is not None:
+            weights[new_sid] += 1
+            continue
+        new_sid = sid_of[key] = len(weights)
+        weights.append(1)
+        # sids only grow: every column stays sorted
+        for eid, event in enumerate(key, 1):
+            k = (new_sid << EID_BITS) | eid
+            for it in event:
+                col = cols.get(it)
+                if col is None:
+                    cols[it] = array("q", (k,))
+                else:
+                    col.append(k)
+
+    return {it: Tidlist(col) for it, col in cols.items()}, weights
@@ -0,0 +1,345 @@
+"""
+Diffset (dSPADE-style) tidlists for dense datasets.
+
+A member of the equivalence class of prefix P stores only the occurrences it
+lacks relative to a base shared by the class (dEclat diffsets over packed
+(sid, eid) keys):
+
+- an I-member P+x (x added to the last event of P) keeps keys of t(P):
+  diff(P+x) = t(P) - t(P+x);
+- an S-member P->x keeps keys after P: its base U(P) is every event that
+  follows the first occurrence of P in its sequence, and
+  diff(P->x) = U(P) - t(P->x).
+
+The joins of a class only read diffs. An I-join child of PX and PY (both
+I-members or both S-members, i.e. the same base) is stored against its
+parent t(PX):
+
+    diff(PXY) = diff(PY) - diff(PX)
+
+and an S-join child of PX and the S-member P->y is stored against U(PX),
+which lies inside U(P):
+
+    diff(PX->y) = diff(P->y) & U(PX)   (keys after the first occurrence of PX)
+
+Lengths and supports follow by subtraction: |t| = |base| - |diff|, and a sid
+of the base is lost when the diff holds all of its keys there, so
+sup = sup(base) - (weight of the lost sids). Neither members nor children are
+rebuilt; the joins only look up first keys and per-sid counts of the bases.
+
+Diffs are short where items fill most events after their prefix. dspade /
+bspade switch the children of a plain member to diffsets when their average
+shrink ratio |base - child| / |base| is below a threshold; the classes below
+a diffset class stay diffsets.
+"""
+from __future__ import annotations
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from . import tidlist as _tidlist
+from .join import INFREQUENT
+from .node import Node
+from .tidlist import Tidlist, EID_BITS, occurrences, sids_weight
+from .vertical import support
+
+# default threshold of run_and_stat --diffsets
+DIFFSET_THRESHOLD = 0.5
+
+
+class _Plain:
+    """t(X) of a plain tidlist: the base of the I-members below it."""
+    __slots__ = ("tl", "sup", "occ", "_first")
+
+    def __init__(self, tl: Tidlist):
+        self.tl = tl
+        self.sup = support(tl)
+        self.occ = occurrences(tl)
+        self._first = None
+
+    def first(self) -> Dict[int, int]:
+        # sid -> first key, in sid order
+        if self._first is None:
+            self._first = {k >> EID_BITS: k for k in self.tl.first_keys()}
+        return self._first
+
+    def _span(self, sid: int) -> Tuple[int, int]:
+        keys = self.tl.keys
+        lo = bisect_left(keys, sid << EID_BITS)
+        return lo, bisect_left(keys, (sid + 1) << EID_BITS, lo)
+
+    def count(self, sid: int) -> int:
+        lo, hi = self._span(sid)
+        return hi - lo
+
+    def keys_in(self, sid: int):
+        lo, hi = self._span(sid)
+        return self.tl.keys[lo:hi]
+
+    def release(self) -> None:
+        self._first = None
+
+    def __len__(self) -> int:
+        return len(self.tl)
+
+
+class Events:
+    """
+    Every key of a frequent item, sorted, with the position after each key
+    (next) and after the last key of each sid (ends).
+    """
+    __slots__ = ("keys", "next", "ends")
+
+    def __init__(self, item_tidlists: Iterable[Tidlist]):
+        self.keys = array("q", sorted(set().union(*(t.keys for t in item_tidlists))))
+        self.next = {k: i for i, k in enumerate(self.keys, 1)}
+        self.ends = {k >> EID_BITS: i for k, i in self.next.items()}
+
+
+class _After:
+    """U(X): the events of every sequence after the first occurrence of X there."""
+    __slots__ = ("x", "events", "_spans", "_first", "_totals")
+
+    def __init__(self, x, events: Events):
+        self.x = x
+        self.events = events
+        self._spans = None
+        self._first = None
+        self._totals = None
+
+    def spans(self) -> Dict[int, Tuple[int, int]]:
+        # sid -> [lo, hi) in events, for the sids with an event after X
+        if self._spans is None:
+            nxt = self.events.next
+            ends = self.events.ends
+            spans = {}
+            for sid, f in self.x.first().items():
+                # first keys are occurrences of frequent items, i.e. events
+                lo = nxt[f]
+                hi = ends[sid]
+                if lo < hi:
+                    spans[sid] = (lo, hi)
+            self._spans = spans
+            if self._totals is None:
+                w = _tidlist.SID_WEIGHTS
+                n = sum(hi - lo for lo, hi in spans.values())
+                occ = n if w is None else sum(w[s] * (hi - lo) for s, (lo, hi) in spans.items())
+                self._totals = (n, sids_weight(spans), occ)
+        return self._spans
+
+    def _total(self, i: int) -> int:
+        if self._totals is None:
+            self.spans()
+        return self._totals[i]
+
+    @property
+    def sup(self) -> int:
+        return self._total(1)
+
+    @property
+    def occ(self) -> int:
+        return self._total(2)
+
+    def first(self) -> Dict[int, int]:
+        if self._first is None:
+            ev = self.events.keys
+            self._first = {sid: ev[lo] for sid, (lo, _) in self.spans().items()}
+        return self._first
+
+    def count(self, sid: int) -> int:
+        span = self.spans().get(sid)
+        return 0 if span is None else span[1] - span[0]
+
+    def keys_in(self, sid: int):
+        span = self.spans().get(sid)
+        return () if span is None else self.events.keys[span[0]:span[1]]
+
+    def release(self) -> None:
+        self._spans = self._first = None
+
+    def __len__(self) -> int:
+        return self._total(0)
+
+
+class DiffTidlist:
+    """
+    Tidlist stored as base - diff (see the module docstring). len(), sup and
+    the occurrence count are those of the full tidlist (OUT is unchanged);
+    stored_len is what is held. The lookups the joins need (lost keys, first
+    keys, per-sid counts) are cached until release_first(). keys rebuilds
+    the full list (tests, pickling, debug counters).
+    """
+    __slots__ = ("base", "diff", "sup", "occ", "events", "_len", "_lost", "_counts", "_first", "_after")
+
+    def __init__(self, base, diff: array, sup: int, length: int, occ: int, events: Events):
+        self.base = base
+        self.diff = diff
+        self.sup = sup
+        self.occ = occ
+        self.events = events
+        self._len = length
+        self._lost = None
+        self._counts = None
+        self._first = None
+        self._after = None
+
+    def lost(self) -> set:
+        if self._lost is None:
+            self._lost = set(self.diff)
+        return self._lost
+
+    def _diff_counts(self) -> Counter:
+        if self._counts is None:
+            self._counts = Counter(k >> EID_BITS for k in self.diff)
+        return self._counts
+
+    def first(self) -> Dict[int, int]:
+        # sid -> first key, in sid order: the first base key not in the diff
+        if self._first is None:
+            base = self.base
+            lost = self.lost()
+            counts = self._diff_counts()
+            first = {}
+            for sid, f in base.first().items():
+                if f not in lost:
+                    first[sid] = f
+                elif counts[sid] < base.count(sid):
+                    for k in base.keys_in(sid):
+                        if k not in lost:
+                            first[sid] = k
+                            break
+            self._first = first
+        return self._first
+
+    def count(self, sid: int) -> int:
+        return self.base.count(sid) - self._diff_counts()[sid]
+
+    def keys_in(self, sid: int) -> List[int]:
+        lost = self.lost()
+        return [k for k in self.base.keys_in(sid) if k not in lost]
+
+    def after(self) -> _After:
+        # U(self): the base of the S-members below this one
+        if self._after is None:
+            self._after = _After(self, self.events)
+        return self._after
+
+    @property
+    def keys(self) -> array:
+        return array("q", [k for sid in self.first() for k in self.keys_in(sid)])
+
+    def first_keys(self) -> array:
+        # as Tidlist.first_keys
+        return array("q", self.first().values())
+
+    def release_first(self) -> None:
+        self._lost = self._counts = self._first = None
+        if self._after is not None:
+            self._after.release()
+        if not isinstance(self.base, DiffTidlist):
+            # U(X) or a plain t(X), shared by the class: rebuilt on demand
+            self.base.release()
+
+    @property
+    def stored_len(self) -> int:
+        return len(self.diff)
+
+    def __reduce__(self):
+        # sent between processes as a plain tidlist, not with its base chain
+        return Tidlist, (self.keys, self.sup)
+
+    def is_sorted(self) -> bool:
+        k = self.keys
+        return all(x < y for x, y in zip(k, k[1:]))
+
+    def sids(self):
+        return iter(self.first())
+
+    def nbytes(self) -> int:
+        return self.diff.itemsize * len(self.diff)
+
+    def __len__(self) -> int:
+        return self._len
+
+    def __repr__(self) -> str:
+        return f"DiffTidlist(len={self._len}, diff={len(self.diff)})"
+
+
+def _child(base, diff: array, minsup: int, events: Events) -> Optional[DiffTidlist]:
+    # support by subtraction: a sid of the base is lost once the diff holds all its keys there
+    counts = Counter(k >> EID_BITS for k in diff)
+    sup = base.sup - sids_weight([sid for sid, c in counts.items() if c == base.count(sid)])
+    if sup < minsup:
+        return INFREQUENT
+    w = _tidlist.SID_WEIGHTS
+    occ = len(base) - len(diff) if w is None else base.occ - sum(w[sid] * c for sid, c in counts.items())
+    return DiffTidlist(base, diff, sup, len(base) - len(diff), occ, events)
+
+
+def i_join_minsup(t1: DiffTidlist, t2: DiffTidlist, minsup: int) -> Optional[DiffTidlist]:
+    """
+    I-join of two members of one class (same base), stored against the
+    child's parent t1: diff(PXY) = diff(PY) - diff(PX).
+    """
+    lost = t1.lost()
+    return _child(t1, array("q", [k for k in t2.diff if k not in lost]), minsup, t1.events)
+
+
+def s_join_minsup(t1: DiffTidlist, t2: DiffTidlist, minsup: int) -> Optional[DiffTidlist]:
+    """
+    S-join of a member t1 (PX) with an S-member t2 (P->y), stored against
+    U(PX): the keys of diff(P->y) after the first occurrence of PX.
+    """
+    first = t1.first()
+    diff = array("q", [k for k in t2.diff if first.get(k >> EID_BITS, k) < k])
+    return _child(t1.after(), diff, minsup, t1.events)
+
+
+class Diffsets:
+    """
+    Diffset mode of one run: the switch threshold and the events of the
+    database (every key of a frequent item), which the S-member bases read.
+    """
+    __slots__ = ("threshold", "events")
+
+    def __init__(self, threshold: float, item_tidlists: Iterable[Tidlist]):
+        self.threshold = threshold
+        self.events = Events(item_tidlists)
+
+    def convert(self, class_nodes: List[Node], buckets: List[List[Node]]) -> List[List[Node]]:
+        """
+        buckets of a joined class (spade.candidates.join_class, before it
+        drops the members' first-key indexes), with the children of every
+        plain member stored as diffsets when their average shrink ratio is
+        below the threshold. Children of diffset members already are diffsets.
+        """
+        out: List[List[Node]] = []
+        for parent, bucket in zip(class_nodes, buckets):
+            if bucket and not isinstance(parent.tidlist, DiffTidlist):
+                bucket = self._convert(parent, bucket)
+            out.append(bucket)
+        return out
+
+    def _convert(self, parent: Node, bucket: List[Node]) -> List[Node]:
+        i_base = _Plain(parent.tidlist)
+        s_base = _After(i_base, self.events)
+        events = len(parent.pattern)
+        bases = [s_base if len(c.pattern) > events else i_base for c in bucket]
+        shrink = sum((len(base) - len(c.tidlist)) / len(base) for c, base in zip(bucket, bases))
+        if shrink / len(bucket) >= self.threshold:
+            return bucket
+
+        nodes: List[Node] = []
+        for c, base in zip(bucket, bases):
+            kept = set(c.tidlist.keys)
+            diff = array("q", [k for sid in base.first() for k in base.keys_in(sid) if k not in kept])
+            tl = DiffTidlist(base, diff, c.sup, len(c.tidlist), occurrences(c.tidlist), self.events)
+            nodes.append(Node(pattern=c.pattern, tidlist=tl, sup=c.sup))
+        return nodes
+
+
+def release(nodes: Iterable[Node]) -> None:
+    # lookups the joins of the classes below these nodes cached on them
+    for n in nodes:
+        n.tidlist.release_first()
@@ -1,15 +1,19 @@
 from __future__ import annotations
-from typing import Dict, List, Tuple, Callable
+from typing import Dict, List, Optional, Tuple, Callable
 from collections import defaultdict
 
-from .node import Node
-from .vertical import Tid
-from .pattern import Pattern
+from .node import Node, PatternRow, by_sort_key
+from .tidlist import Tidlist
+from .pattern import Pattern, Item
 from .pattern_utils import split_last_step, pattern_sort_key
-from .candidates import join_in_class
+from .candidates import join_class
 from .f2 import gen_f2
+from .cmap import CoocMap
+from . import diffset
+from .parallel import process_pool
 
 import gc
+import heapq
 
 
 class StatsCounter:
@@ -24,6 +28,10 @@ class StatsCounter:
         self.max_discovered_len = 0
         self.attempted_by_len = {}
         self.sum_tid_attempted = {}
+        self.sum_tid_materialized = {}
+        self.abandoned_by_len = {}
+        self.count_rejected_by_len = {}
+        self.pruned_cmap_by_len = {}
         self.gc_enabled = False
 
 
@@ -36,7 +44,7 @@ class StatsCounter:
             self.max_candidate_len = k
         self._inc(self.candidates_by_len, k, 1)
         self._inc(self.sum_sup_cand, k, node.sup)
-        self._inc(self.sum_tid_cand, k, node.len_tidlist)
+        self._inc(self.sum_tid_cand, k, node.stored_len)
 
     def add_discovered(self, node: Node):
         k = node.length
@@ -44,14 +52,51 @@ class StatsCounter:
             self.max_discovered_len = k
         self._inc(self.discovered_by_len, k, 1)
         self._inc(self.sum_sup_disc, k, node.sup)
-        self._inc(self.sum_tid_disc, k, node.len_tidlist)
+        self._inc(self.sum_tid_disc, k, node.stored_len)
 
-    def add_attempted(self, k: int, tidlist_len: int):
+    def add_attempted(self, k: int, tidlist_len: int, materialized_len: Optional[int] = None):
+        # tidlist_len: length of the full join result (an upper bound for abandoned
+        # joins, spade.join.abandoned_len); materialized_len: what was actually
+        # built (the same unless the join stopped early)
         if k > self.max_candidate_len:
             self.max_candidate_len = k
         self._inc(self.attempted_by_len, k, 1)
         self._inc(self.sum_tid_attempted, k, tidlist_len)
+        self._inc(self.sum_tid_materialized, k, tidlist_len if materialized_len is None else materialized_len)
 
+    def add_abandoned(self, k: int, tidlist_len: int):
+        # attempted join stopped early (minsup unreachable): nothing materialized
+        self.add_attempted(k, tidlist_len, 0)
+        self._inc(self.abandoned_by_len, k, 1)
+
+    def add_count_rejected(self, k: int, tidlist_len: int):
+        # attempted F2 pair rejected by the horizontal count: no join at all
+        self.add_attempted(k, tidlist_len, 0)
+        self._inc(self.count_rejected_by_len, k, 1)
+
+    def add_pruned_cmap(self, k: int):
+        # candidate skipped by the co-occurrence map: not attempted, no join
+        if k > self.max_candidate_len:
+            self.max_candidate_len = k
+        self._inc(self.pruned_cmap_by_len, k, 1)
+
+    # per-length counters, summed by merge()
+    _BY_LEN = (
+        "candidates_by_len", "discovered_by_len",
+        "sum_sup_cand", "sum_tid_cand", "sum_sup_disc", "sum_tid_disc",
+        "attempted_by_len", "sum_tid_attempted", "sum_tid_materialized", "abandoned_by_len",
+        "count_rejected_by_len", "pruned_cmap_by_len",
+    )
+
+    def merge(self, other: StatsCounter) -> None:
+        # adds the counters of another run over a disjoint part of the search
+        # (e.g. one top-level class mined by a dspade worker)
+        for name in self._BY_LEN:
+            mine = getattr(self, name)
+            for k, v in getattr(other, name).items():
+                self._inc(mine, k, v)
+        self.max_candidate_len = max(self.max_candidate_len, other.max_candidate_len)
+        self.max_discovered_len = max(self.max_discovered_len, other.max_discovered_len)
 
     def total_candidates(self) -> int:
         return sum(self.candidates_by_len.values())
@@ -77,6 +122,18 @@ class StatsCounter:
     def total_sum_tid_attempted(self) -> int:
         return sum(self.sum_tid_attempted.values())
 
+    def total_sum_tid_materialized(self) -> int:
+        return sum(self.sum_tid_materialized.values())
+
+    def total_abandoned(self) -> int:
+        return sum(self.abandoned_by_len.values())
+
+    def total_count_rejected(self) -> int:
+        return sum(self.count_rejected_by_len.values())
+
+    def total_pruned_cmap(self) -> int:
+        return sum(self.pruned_cmap_by_len.values())
+
 
 
 def _group_by_prefix(nodes: List[Node]) -> Dict[Pattern, List[Node]]:
@@ -87,85 +144,158 @@ def _group_by_prefix(nodes: List[Node]) -> Dict[Pattern, List[Node]]:
 
     # deterministic sorting inside each class
     for pref in list(classes.keys()):
-        classes[pref] = sorted(classes[pref], key=lambda x: pattern_sort_key(x.pattern))
+        classes[pref] = sorted(classes[pref], key=by_sort_key)
 
     # deterministic order of classes
     return dict(sorted(classes.items(), key=lambda kv: pattern_sort_key(kv[0])))
 
 
-def _f1_nodes_to_f2_nodes(f1_nodes: List[Node], minsup: int, stats: StatsCounter | None = None) -> List[Node]:
-    f1_tuples: List[Tuple[str, List[Tid], int]] = []
+def _f1_nodes_to_f2_nodes(
+    f1_nodes: List[Node], minsup: int, stats: StatsCounter | None = None, workers: int = 1
+) -> List[Node]:
+    f1_tuples: List[Tuple[Item, Tidlist, int]] = []
     for n in sorted(f1_nodes, key=lambda x: x.pattern[0][0]):
         item = n.pattern[0][0]
         f1_tuples.append((item, n.tidlist, n.sup))
-    f2 = gen_f2(f1_tuples, minsup, stats=stats)
-    return [Node(pattern=p, tidlist=tl) for (p, tl, _sup) in f2]
+    f2 = gen_f2(f1_tuples, minsup, stats=stats, workers=workers)
+    return [Node(pattern=p, tidlist=tl, sup=sup) for (p, tl, sup) in f2]
+
+
+def _mine_class(
+    class_nodes: List[Node],
+    minsup: int,
+    discover: Callable[[Node], None],
+    stats: StatsCounter | None,
+    diffsets: diffset.Diffsets | None,
+    cmap: CoocMap | None = None,
+) -> None:
+    """
+    DFS below one equivalence class: joins its members pairwise, passes the
+    frequent children to discover (sorted) and recurses into their sub-classes.
+    """
+    # next level candidates via pairwise joins, already split into the
+    # sub-classes below each member
+    buckets = join_class(class_nodes, minsup, stats=stats, cmap=cmap, diffsets=diffsets)
+    if stats:
+        for bucket in buckets:
+            for c in bucket:
+                stats.add_candidate(c)
+
+    if not any(buckets):
+        return
+
+    # discover next_level nodes (they are frequent by construction) in sort
+    # order: the buckets are sorted, merging them is enough
+    for n in heapq.merge(*buckets, key=by_sort_key):
+        discover(n)
+
+    # recurse into sub-classes (bucket order = order of their prefixes)
+    for member, sub_nodes in zip(class_nodes, buckets):
+        if sub_nodes:
+            _mine_class(sub_nodes, minsup, discover, stats, diffsets, cmap)
+            if diffsets is not None:
+                # lookups of the sub-class joins on their base
+                member.tidlist.release_first()
+
+    # GC checkpoint: end of DFS class
+    if stats is not None and stats.gc_enabled:
+        gc.collect()
+
+
+# Per-process state of a dspade worker, set once by _init_worker.
+_worker = None
+
+
+def _init_worker(classes, minsup, diffsets, gc_enabled, cmap):
+    global _worker
+    _worker = (classes, minsup, diffsets, gc_enabled, cmap)
+
+
+def _mine_top_class(idx: int):
+    # discovered rows of one top-level class, in serial order, plus its counters;
+    # no tidlists: the parent only writes OUT rows
+    classes, minsup, diffsets, gc_enabled, cmap = _worker
+    stats = StatsCounter()
+    stats.gc_enabled = gc_enabled
+    rows = []
+
+    def discover(n: Node):
+        rows.append((n.pattern, n.len_tidlist, n.stored_len, n.sup))
+        stats.add_discovered(n)
+
+    _mine_class(classes[idx], minsup, discover, stats, diffsets, cmap)
+    return rows, stats
 
 
 def dspade(
     f1_nodes: List[Node],
-    item_tidlists: Dict[str, List[Tid]],
+    item_tidlists: Dict[Item, Tidlist],
     minsup: int,
     on_discover: Callable[[Node], None] | None = None,
     stats: StatsCounter | None = None,
-) -> List[Node]:
+    diffset_threshold: float | None = None,
+    workers: int = 1,
+    use_cmap: bool = False,
+) -> List[Node | PatternRow]:
     """
     SPADE-like DFS (dSPADE): depth-first over equivalence classes (prefix-based).
     API unchanged: takes f1_nodes + item_tidlists, but internally uses SPADE joins.
+    diffset_threshold: store the children of a member as diffsets when their
+    average shrink ratio is below it (spade.diffset); None = plain tidlists.
+    workers > 1: F2 and then the top-level classes (F2 prefixes) are mined in
+    a process pool; results are re-sequenced per class, so discovery order and counters
+    are the same as with one worker. The patterns of those classes come back
+    as PatternRow (no tidlist).
+    use_cmap: skip joins whose last two atoms are not in F2 (spade.cmap);
+    the skipped candidates are counted as pruned_by_cmap, not attempted.
     """
-    discovered: List[Node] = []
+    discovered: List[Node | PatternRow] = []
+
+    def discover(n: Node):
+        discovered.append(n)
+        if on_discover:
+            on_discover(n)
+        if stats:
+            stats.add_discovered(n)
 
     # record F1
-    for n in sorted(f1_nodes, key=lambda x: pattern_sort_key(x.pattern)):
+    for n in sorted(f1_nodes, key=by_sort_key):
         if stats:
-            stats.add_attempted(n.length, n.len_tidlist)
+            stats.add_attempted(n.length, n.stored_len)
             stats.add_candidate(n)
-        discovered.append(n)
-        if on_discover: on_discover(n)
-        if stats: stats.add_discovered(n)
+        discover(n)
 
     # build & record F2
-    f2_nodes = _f1_nodes_to_f2_nodes(f1_nodes, minsup, stats=stats)
-    for n in sorted(f2_nodes, key=lambda x: pattern_sort_key(x.pattern)):
+    f2_nodes = _f1_nodes_to_f2_nodes(f1_nodes, minsup, stats=stats, workers=workers)
+    for n in sorted(f2_nodes, key=by_sort_key):
         if stats: stats.add_candidate(n)
-        discovered.append(n)
-        if on_discover: on_discover(n)
-        if stats: stats.add_discovered(n)
-
-    classes = _group_by_prefix(f2_nodes)
-
-    def recurse(class_nodes: List[Node]):
-        # generate next level candidates within this class via pairwise joins
-        next_level: List[Node] = []
-        for i in range(len(class_nodes)):
-            for j in range(i + 1, len(class_nodes)):
-                cand = join_in_class(class_nodes[i], class_nodes[j], minsup, stats=stats)
-                if stats:
-                    for c in cand:
-                        stats.add_candidate(c)
-                next_level.extend(cand)
-
-        if not next_level:
-            return
-
-        # discover next_level nodes (they are frequent by construction)
-        for n in sorted(next_level, key=lambda x: pattern_sort_key(x.pattern)):
-            discovered.append(n)
-            if on_discover:
-                on_discover(n)
+        discover(n)
+
+    cmap = CoocMap.from_f2(f2_nodes) if use_cmap else None
+    classes = list(_group_by_prefix(f2_nodes).values())
+    diffsets = None
+    if diffset_threshold is not None:
+        diffsets = diffset.Diffsets(diffset_threshold, item_tidlists.values())
+
+    if workers <= 1 or len(classes) <= 1:
+        for cls in classes:
+            _mine_class(cls, minsup, discover, stats, diffsets, cmap)
+        return discovered
+
+    gc_enabled = stats is not None and stats.gc_enabled
+    with process_pool(
+        min(workers, len(classes)),
+        _init_worker,
+        (classes, minsup, diffsets, gc_enabled, cmap),
+    ) as pool:
+        # map yields in class order: OUT is written exactly as in the serial run
+        for rows, class_stats in pool.map(_mine_top_class, range(len(classes))):
+            for row in rows:
+                n = PatternRow(*row)
+                discovered.append(n)
+                if on_discover:
+                    on_discover(n)
             if stats:
-                stats.add_discovered(n)
-
-        # recurse into sub-classes
-        sub = _group_by_prefix(next_level)
-        for _pref, sub_nodes in sub.items():
-            recurse(sub_nodes)
-
-        # GC checkpoint: end of DFS class
-        if stats is not None and stats.gc_enabled:
-            gc.collect()
-
-    for _pref, cls in classes.items():
-        recurse(cls)
+                stats.merge(class_stats)
 
     return discovered
@@ -1,32 +1,32 @@
 from __future__ import annotations
 from typing import Dict, List, Tuple
-from .pattern import Pattern, Event
-from .join import i_join, s_join
-from .vertical import Tid, support
+from .pattern import Pattern, Event, Item
+from . import join
+from .tidlist import Tidlist
 
 def last_event(p: Pattern) -> Event:
     return p[-1]
 
-def make_i_extension(p: Pattern, item: str) -> Pattern:
+def make_i_extension(p: Pattern, item: Item) -> Pattern:
     # add item to the last event (I-step)
     ev = tuple(sorted(set(last_event(p) + (item,))))
     return p[:-1] + (ev,)
 
-def make_s_extension(p: Pattern, item: str) -> Pattern:
+def make_s_extension(p: Pattern, item: Item) -> Pattern:
     # add new event with item (S-step)
     return p + ((item,),)
 
 def extend_node(
     pattern: Pattern,
-    tidlist: List[Tid],
-    item_tidlists: Dict[str, List[Tid]],
+    tidlist: Tidlist,
+    item_tidlists: Dict[Item, Tidlist],
     minsup: int,
-) -> List[Tuple[Pattern, List[Tid]]]:
+) -> List[Tuple[Pattern, Tidlist]]:
     """
     Returns a list of (new_pattern, new_tidlist) in deterministic order:
     first I-steps (adding item to last event), then S-steps (adding new event with item).
     """
-    out: List[Tuple[Pattern, List[Tid]]] = []
+    out: List[Tuple[Pattern, Tidlist]] = []
 
     last_ev = last_event(pattern)
     last_max_item = last_ev[-1]  # because events are sorted tuples
@@ -35,14 +35,14 @@ def extend_node(
     for it in sorted(item_tidlists.keys()):
         if it <= last_max_item:
             continue
-        new_tl = i_join(tidlist, item_tidlists[it])
-        if support(new_tl) >= minsup:
+        new_tl = join.i_join_minsup(tidlist, item_tidlists[it], minsup)
+        if new_tl is not join.INFREQUENT:
             out.append((make_i_extension(pattern, it), new_tl))
 
     # S-step: all items
     for it in sorted(item_tidlists.keys()):
-        new_tl = s_join(tidlist, item_tidlists[it])
-        if support(new_tl) >= minsup:
+        new_tl = join.s_join_minsup(tidlist, item_tidlists[it], minsup)
+        if new_tl is not join.INFREQUENT:
             out.append((make_s_extension(pattern, it), new_tl))
 
     return out
@@ -50,15 +50,15 @@ def extend_node(
 
 def extend_node_maxelts(
     pattern: Pattern,
-    tidlist: List[Tid],
-    item_tidlists: Dict[str, List[Tid]],
+    tidlist: Tidlist,
+    item_tidlists: Dict[Item, Tidlist],
     minsup: int,
     max_elts: int,
-) -> List[Tuple[Pattern, List[Tid]]]:
+) -> List[Tuple[Pattern, Tidlist]]:
     """
     Like extend_node, but respects max_elts constraint.
     """
-    out: List[Tuple[Pattern, List[Tid]]] = []
+    out: List[Tuple[Pattern, Tidlist]] = []
 
     current_elts = sum(len(ev) for ev in pattern)
     if current_elts >= max_elts:
@@ -72,15 +72,15 @@ def extend_node_maxelts(
         for it in sorted(item_tidlists.keys()):
             if it <= last_max_item:
                 continue
-            new_tl = i_join(tidlist, item_tidlists[it])
-            if support(new_tl) >= minsup:
+            new_tl = join.i_join_minsup(tidlist, item_tidlists[it], minsup)
+            if new_tl is not join.INFREQUENT:
                 out.append((make_i_extension(pattern, it), new_tl))
 
     # S-step: adding a new event with 1 element
     if current_elts + 1 <= max_elts:
         for it in sorted(item_tidlists.keys()):
-            new_tl = s_join(tidlist, item_tidlists[it])
-            if support(new_tl) >= minsup:
+            new_tl = join.s_join_minsup(tidlist, item_tidlists[it], minsup)
+            if new_tl is not join.INFREQUENT:
                 out.append((make_s_extension(pattern, it), new_tl))
 
     return out
\ No newline at end of file
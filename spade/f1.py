@@ -1,8 +1,10 @@
 from __future__ import annotations
 from typing import Dict, List, Tuple
-from .vertical import VerticalDB, support, Tid
+from .tidlist import Tidlist
+from .pattern import Item
+from .vertical import VerticalDB, support
 
-def frequent_items(vdb: VerticalDB, minsup: int) -> List[Tuple[str, List[Tid], int]]:
+def frequent_items(vdb: VerticalDB, minsup: int) -> List[Tuple[Item, Tidlist, int]]:
     """
     Returns a list: (item, tidlist, sup) sorted alphabetically by item to ensure deterministic output.
     
@@ -1,49 +1,215 @@
 from __future__ import annotations
-from typing import Dict, List, Tuple, Any
-from .pattern import Pattern
-from .join import i_join, s_join
-from .vertical import Tid, support
+from collections import defaultdict
+from typing import Dict, List, Tuple, Any, Optional
+from .pattern import Pattern, Item
+from . import join
+from . import tidlist as _tidlist
+from .tidlist import Tidlist, EID_BITS, EID_MASK
+from .parallel import process_pool
 
-def gen_f2(
-    f1: List[Tuple[str, List[Tid], int]],
-    minsup: int,
-    stats: Any | None = None
-) -> List[Tuple[Pattern, List[Tid], int]]:
+F2Row = Tuple[Pattern, Tidlist, int]
+
+# "horizontal": count all pairs in one pass over the sequences, join only the
+# frequent ones; "join": i_join/s_join every ordered pair.
+F2_METHODS = ("horizontal", "join")
+F2_METHOD = "join"
+# precomputed counts of the dataset's item pairs (spade.f2cache.PairCounts);
+# the "horizontal" method reads them instead of calling count_pairs
+PAIR_COUNTS = None
+
+
+def set_f2_method(name: str) -> None:
+    global F2_METHOD
+    if name not in F2_METHODS:
+        raise ValueError(f"Unknown F2 method: {name} (expected one of {F2_METHODS})")
+    F2_METHOD = name
+
+
+def set_pair_counts(counts) -> None:
+    global PAIR_COUNTS
+    PAIR_COUNTS = counts
+
+
+def count_pairs(
+    items: List[Item], tid: Dict[Item, Tidlist]
+) -> Tuple[List[int], List[int], List[int], List[int]]:
     """
-    Returns frequent length-2 patterns: (pattern, tidlist, sup). 
+    Horizontal F2 count (SPADE's 2-D count arrays): rebuilds every sequence
+    from the F1 tidlists and walks it once. Returns flat n*n arrays indexed by
+    i*n+j with the number of sids (their weight, see spade.dedup) containing <{items[i],items[j]}> (i < j) and
+    <{items[i]}->{items[j]}> respectively, then the lengths of the
+    corresponding i_join / s_join tidlists (occurrences, not weighted), which
+    the STAT counts for the pairs rejected without a join.
     """
-    items = [it for (it, _, _) in f1]
-    tid = {it: tl for (it, tl, _) in f1}
+    n = len(items)
+    events: Dict[int, List[int]] = defaultdict(list)  # sid -> eid<<32|item index
+    for idx, it in enumerate(items):
+        for k in tid[it].keys:
+            events[k >> EID_BITS].append(((k & EID_MASK) << EID_BITS) | idx)
+
+    weights = _tidlist.SID_WEIGHTS
+    i_count = [0] * (n * n)
+    s_count = [0] * (n * n)
+    i_len = [0] * (n * n)
+    s_len = [0] * (n * n)
+    for sid, seq in events.items():
+        seq.sort()
+        i_pairs = set()
+        s_pairs = set()
+        before: List[int] = []  # items seen at an earlier eid (first occurrences)
+        seen = set()
+        pos = 0
+        while pos < len(seq):
+            eid = seq[pos] >> EID_BITS
+            end = pos
+            while end < len(seq) and seq[end] >> EID_BITS == eid:
+                end += 1
+            event = [e & EID_MASK for e in seq[pos:end]]  # ascending item index
+            for a, x in enumerate(event):
+                for y in event[a + 1:]:
+                    i_pairs.add(x * n + y)
+                    i_len[x * n + y] += 1
+                for b in before:
+                    s_pairs.add(b * n + x)
+                    s_len[b * n + x] += 1
+            for x in event:
+                if x not in seen:
+                    seen.add(x)
+                    before.append(x)
+            pos = end
+        w = 1 if weights is None else weights[sid]
+        for c in i_pairs:
+            i_count[c] += w
+        for c in s_pairs:
+            s_count[c] += w
+    return i_count, s_count, i_len, s_len
 
-    out: List[Tuple[Pattern, List[Tid], int]] = []
+
+def _pairs_of(
+    i: int,
+    items: List[Item],
+    tid: Dict[Item, Tidlist],
+    minsup: int,
+    stats: Any | None,
+    counts: Optional[Tuple[List[int], List[int], List[int], List[int]]] = None,
+) -> Tuple[List[F2Row], List[F2Row]]:
+    """
+    All F2 pairs whose first item is items[i]:
+    I-steps <{x,y}> with y after x, and S-steps <{x}->{y}> for every y.
+    With counts (count_pairs), pairs below minsup are rejected without a join.
+    """
+    x = items[i]
+    n = len(items)
+    i_rows: List[F2Row] = []
+    s_rows: List[F2Row] = []
 
     # I-step: <{x,y}>
-    for i in range(len(items)):
-        for j in range(i+1, len(items)):
-            x, y = items[i], items[j]
-            tl = i_join(tid[x], tid[y])
-            
+    for j in range(i+1, n):
+        y = items[j]
+        if counts is not None and counts[0][i * n + j] < minsup:
             if stats is not None:
-                # Wzorzec <{x,y}> ma 1 zdarzenie (length=1)
+                stats.add_count_rejected(1, counts[2][i * n + j])
+            continue
+        tl = join.i_join_minsup(tid[x], tid[y], minsup)
+
+        if stats is not None:
+            # Wzorzec <{x,y}> ma 1 zdarzenie (length=1)
+            if tl is join.INFREQUENT:
+                stats.add_abandoned(1, join.abandoned_len("I", tid[x], tid[y]))
+            else:
                 stats.add_attempted(1, len(tl))
 
-            sup = support(tl)
-            if sup >= minsup:
-                pat: Pattern = ((x, y),)
-                out.append((pat, tl, sup))
+        if tl is not join.INFREQUENT:
+            pat: Pattern = ((x, y),)
+            i_rows.append((pat, tl, tl.sup))
 
     # S-step: <{x}->{y}>
-    for x in items:
-        for y in items:
-            tl = s_join(tid[x], tid[y])
-            
+    for j, y in enumerate(items):
+        if counts is not None and counts[1][i * n + j] < minsup:
             if stats is not None:
-                # Wzorzec <{x}->{y}> ma 2 zdarzenia (length=2)
+                stats.add_count_rejected(2, counts[3][i * n + j])
+            continue
+        tl = join.s_join_minsup(tid[x], tid[y], minsup)
+
+        if stats is not None:
+            # Wzorzec <{x}->{y}> ma 2 zdarzenia (length=2)
+            if tl is join.INFREQUENT:
+                stats.add_abandoned(2, join.abandoned_len("S", tid[x], tid[y]))
+            else:
                 stats.add_attempted(2, len(tl))
 
-            sup = support(tl)
-            if sup >= minsup:
-                pat: Pattern = ((x,), (y,))
-                out.append((pat, tl, sup))
+        if tl is not join.INFREQUENT:
+            pat: Pattern = ((x,), (y,))
+            s_rows.append((pat, tl, tl.sup))
+
+    return i_rows, s_rows
+
+
+# Per-process state of a parallel gen_f2 worker, set once by _init_worker.
+_worker = None
+
+
+def _init_worker(items, tid, minsup, counts):
+    global _worker
+    _worker = (items, tid, minsup, counts)
+
+
+def _pairs_task(i: int):
+    from .dspade import StatsCounter  # dspade imports this module
+
+    items, tid, minsup, counts = _worker
+    stats = StatsCounter()
+    i_rows, s_rows = _pairs_of(i, items, tid, minsup, stats, counts)
+    return i_rows, s_rows, stats
+
+
+def gen_f2(
+    f1: List[Tuple[Item, Tidlist, int]],
+    minsup: int,
+    stats: Any | None = None,
+    workers: int = 1,
+    max_elts: Optional[int] = None,
+) -> List[F2Row]:
+    """
+    Returns frequent length-2 patterns: (pattern, tidlist, sup).
+    Order: all I-steps by (x, y), then all S-steps by (x, y).
+    workers > 1: the pairs are split by their first item across a process
+    pool and reassembled in the same order; the workers' attempted/abandoned
+    counters are merged into stats.
+    With F2_METHOD "horizontal", pairs are counted first (count_pairs) and only
+    the frequent ones are joined; the others still count as attempted (with
+    the tidlist length from the count, nothing materialized) and are
+    reported as count_rejected. The counts are read from
+    PAIR_COUNTS when set (spade.f2cache).
+    max_elts: every F2 pattern has two items, so below 2 nothing is joined.
+    """
+    if max_elts is not None and max_elts < 2:
+        return []
+    items = [it for (it, _, _) in f1]
+    tid = {it: tl for (it, tl, _) in f1}
+    counts = None
+    if F2_METHOD == "horizontal":
+        counts = PAIR_COUNTS.select(items) if PAIR_COUNTS is not None else count_pairs(items, tid)
+
+    if workers <= 1 or len(items) <= 1:
+        parts = [_pairs_of(i, items, tid, minsup, stats, counts) for i in range(len(items))]
+    else:
+        parts = []
+        # a few tasks per worker: I-step rows get shorter with i
+        chunk = max(1, len(items) // (workers * 4))
+        with process_pool(min(workers, len(items)), _init_worker, (items, tid, minsup, counts)) as pool:
+            for i_rows, s_rows, part_stats in pool.map(_pairs_task, range(len(items)), chunksize=chunk):
+                parts.append((i_rows, s_rows))
+                if stats is not None:
+                    stats.merge(part_stats)
+
+    # F1 lists are the left side of no later join
+    for tl in tid.values():
+        tl.release_first()
 
-    return out
\ No newline at end of file
+    out: List[F2Row] = []
+    for i_rows, _ in parts:
+        out.extend(i_rows)
+    for _, s_rows in parts:
+        out.extend(s_rows)
+    return out
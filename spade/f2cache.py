@@ -0,0 +1,148 @@
+"""
+Item-pair support matrices of a dataset, cached next to it.
+
+The horizontal F2 count (spade.f2.count_pairs) does not depend on minsup:
+only the F1 items it is run over do. PairCounts holds the counts of every
+item pair of the dataset (I-steps <{x,y}> and S-steps <{x}->{y}>) and the
+lengths of their joins, from which gen_f2 takes the rows and columns of the
+current F1 items instead of recounting (spade.f2.set_pair_counts). Rejected
+pairs, joins and counters are the same as with a fresh count.
+
+The matrices are saved in a file next to the dataset, named after its
+SHA-256, so runs at any sup or algorithm share one count. Runs
+with deduplicated sequences (spade.dedup) get their own file: the counts are
+the same, but the lengths are those of the deduplicated tidlists.
+
+    magic "SPADEF2C" | version u32 | 0 u32 | meta length u64 | meta (JSON)
+    | padding to 8 bytes | I-counts int64[N*N] | S-counts int64[N*N]
+    | I-lengths int64[N*N] | S-lengths int64[N*N]
+
+meta holds the source hash, whether the lengths are deduplicated and the N
+item labels in matrix order.
+"""
+from __future__ import annotations
+import json
+import struct
+from array import array
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from .f2 import count_pairs
+from .pattern import Item
+from .vertical import VerticalDB
+
+F2_CACHE_SUFFIX = ".f2"
+
+_MAGIC = b"SPADEF2C"
+_VERSION = 3
+_HEADER = struct.Struct("<8sIIQ")  # magic, version, reserved, meta length
+
+
+class PairCounts:
+    """
+    Flat N*N pair counts over item labels: i_count[p*N+q] (p < q) sids with
+    <{labels[p],labels[q]}>, s_count[p*N+q] sids with <{labels[p]}->{labels[q]}>;
+    i_len / s_len are the tidlist lengths of the same joins (count_pairs).
+    codes[c] is the matrix position of item code c (spade.items.encode_items).
+    """
+    __slots__ = ("labels", "i_count", "s_count", "i_len", "s_len", "codes")
+
+    def __init__(self, labels: List[str], i_count: array, s_count: array, i_len: array, s_len: array):
+        self.labels = labels
+        self.i_count = i_count
+        self.s_count = s_count
+        self.i_len = i_len
+        self.s_len = s_len
+        self.codes: Dict[Item, int] = {}
+
+    @classmethod
+    def count(cls, vdb: VerticalDB, labels: List[str]) -> PairCounts:
+        # vdb keyed by item code, labels[code] = label (spade.items.encode_items)
+        codes = sorted(vdb, key=lambda c: labels[c])
+        matrices = count_pairs(codes, vdb)
+        return cls([labels[c] for c in codes], *(array("q", m) for m in matrices))
+
+    def covers(self, labels: List[str]) -> bool:
+        return set(labels) <= set(self.labels)
+
+    def bind(self, labels: List[str]) -> None:
+        # maps the item codes of this run (labels[code]) to matrix positions
+        pos = {label: p for p, label in enumerate(self.labels)}
+        self.codes = {code: pos[label] for code, label in enumerate(labels)}
+
+    def select(self, items: List[Item]) -> Tuple[List[int], List[int], List[int], List[int]]:
+        """count_pairs(items, ...) for item codes, read from the matrices."""
+        n, N = len(items), len(self.labels)
+        pos = [self.codes[it] for it in items]
+        i_count = [0] * (n * n)
+        s_count = [0] * (n * n)
+        i_len = [0] * (n * n)
+        s_len = [0] * (n * n)
+        for i, p in enumerate(pos):
+            row = p * N
+            for j, q in enumerate(pos):
+                s_count[i * n + j] = self.s_count[row + q]
+                s_len[i * n + j] = self.s_len[row + q]
+                if j > i:
+                    # stored once per unordered pair, at the lower position
+                    c = row + q if p < q else q * N + p
+                    i_count[i * n + j] = self.i_count[c]
+                    i_len[i * n + j] = self.i_len[c]
+        return i_count, s_count, i_len, s_len
+
+
+def cache_path(dataset_path: str, source_hash: str, dedup: bool = False) -> Path:
+    p = Path(dataset_path)
+    mode = ".dedup" if dedup else ""
+    return p.with_name(f"{p.stem}.{source_hash[:16]}{mode}{F2_CACHE_SUFFIX}")
+
+
+def save_pair_counts(pc: PairCounts, source_hash: str, path: Path, dedup: bool = False) -> None:
+    meta = json.dumps({"source_sha256": source_hash, "dedup": dedup, "items": pc.labels}).encode("utf-8")
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as f:
+        f.write(_HEADER.pack(_MAGIC, _VERSION, 0, len(meta)))
+        f.write(meta)
+        f.write(b"\0" * (-(_HEADER.size + len(meta)) % 8))
+        for m in (pc.i_count, pc.s_count, pc.i_len, pc.s_len):
+            m.tofile(f)
+    tmp.replace(path)  # concurrent readers never see a partial file
+
+
+def load_pair_counts(path: Path, source_hash: str, dedup: bool = False) -> Optional[PairCounts]:
+    # None when missing, stale (other source or dedup mode) or from another format version
+    try:
+        with open(path, "rb") as f:
+            magic, version, _, meta_len = _HEADER.unpack(f.read(_HEADER.size))
+            if magic != _MAGIC or version != _VERSION:
+                return None
+            meta = json.loads(f.read(meta_len))
+            if meta["source_sha256"] != source_hash or meta["dedup"] != dedup:
+                return None
+            f.read(-(_HEADER.size + meta_len) % 8)
+            n = len(meta["items"])
+            matrices = [array("q") for _ in range(4)]
+            for m in matrices:
+                m.fromfile(f, n * n)
+    except (OSError, EOFError, ValueError, struct.error):
+        return None
+    return PairCounts(meta["items"], *matrices)
+
+
+def cached_pair_counts(
+    vdb: VerticalDB, labels: List[str], dataset_path: str, source_hash: str, dedup: bool = False
+) -> Tuple[PairCounts, bool]:
+    """
+    Pair counts for the items of vdb (bound to its codes) and whether they
+    came from the cache file. A file that does not cover every item (e.g.
+    written by a projected run at a higher sup) is rebuilt. dedup: vdb holds
+    deduplicated sequences (the sid weights are set).
+    """
+    path = cache_path(dataset_path, source_hash, dedup)
+    pc = load_pair_counts(path, source_hash, dedup)
+    hit = pc is not None and pc.covers(labels)
+    if not hit:
+        pc = PairCounts.count(vdb, labels)
+        save_pair_counts(pc, source_hash, path, dedup)
+    pc.bind(labels)
+    return pc, hit
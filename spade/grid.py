@@ -0,0 +1,179 @@
+"""
+Scheduling of grid runs (scripts/run_grid*.py).
+
+A grid is a list of independent (alg, sup, maxElts) configurations over one
+loaded input. run_configs runs them in up to `jobs` forked processes, which
+inherit the loaded vertical DB copy-on-write, most expensive first so that a
+long run does not start last and stretch the makespan.
+
+Cost is the total_attempted_sum_tidlist_len of an earlier STAT of the same
+configuration on the same dataset (same STAT name), else of the same
+algorithm / maxElts at the nearest higher sup (a lower bound).
+Configurations without any history sort first (lowest sup first).
+
+Memory, checked against mem_budget, is the mine_peak_rss_bytes of an earlier
+STAT of the same configuration (the peak resident memory the run added to
+the loaded input, spade.memory). A lower sup needs more, so there is no
+nearest-sup fallback: without that STAT a configuration is assumed to need
+UNKNOWN_MEM_FACTOR times the bytes of the loaded input (up to ~60x observed,
+covid bspade).
+"""
+from __future__ import annotations
+import multiprocessing
+import multiprocessing.connection
+import sys
+import traceback
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .naming import DataInfo, build_stat_name
+
+COST_KEY = "total_attempted_sum_tidlist_len"
+MEM_KEY = "mine_peak_rss_bytes"
+UNKNOWN_MEM_FACTOR = 64
+
+
+@dataclass(frozen=True)
+class GridConfig:
+    alg: str
+    sup: int
+    max_elts: Optional[int] = None
+    # higher sups derived from this run (spade.sweep)
+    sweep: Tuple[int, ...] = ()
+
+    def __str__(self) -> str:
+        e = "" if self.max_elts is None else f" maxElts={self.max_elts}"
+        w = "" if not self.sweep else f" (+ sups {','.join(map(str, self.sweep))})"
+        return f"{self.alg} sup={self.sup}{e}{w}"
+
+
+def sweep_configs(configs: List[GridConfig]) -> List[GridConfig]:
+    # one run per (alg, maxElts) at its lowest sup, the other sups derived from it
+    groups: Dict[tuple, List[int]] = {}
+    for c in configs:
+        groups.setdefault((c.alg, c.max_elts), []).append(c.sup)
+    out = []
+    for (alg, max_elts), sups in groups.items():
+        sups = sorted(set(sups))
+        out.append(GridConfig(alg, sups[0], max_elts, tuple(sups[1:])))
+    return out
+
+
+def _stat_value(path: Path, key: str) -> Optional[int]:
+    for line in path.read_text(encoding="utf-8", errors="ignore").splitlines():
+        k, _, v = line.partition(":")
+        if k.strip() == key:
+            try:
+                return int(v.strip())
+            except ValueError:
+                return None
+    return None
+
+
+def estimate_cost(results_dir: Path, info: DataInfo, cfg: GridConfig) -> Optional[int]:
+    """total_attempted_sum_tidlist_len from earlier STAT files, None without history."""
+    exact = results_dir / build_stat_name(cfg.alg, info, cfg.sup, cfg.max_elts)
+    if exact.is_file():
+        cost = _stat_value(exact, COST_KEY)
+        if cost is not None:
+            return cost
+
+    # nearest higher sup of the same algorithm / maxElts on the same dataset
+    name = build_stat_name(cfg.alg, info, 0, cfg.max_elts)
+    i = name.rindex("_s0")
+    best = None
+    for path in results_dir.glob(name[:i] + "_s*" + name[i + 3:]):
+        sup = _stat_value(path, "sup")
+        if sup is None or sup <= cfg.sup or _stat_value(path, "maxElts") != cfg.max_elts:
+            continue
+        cost = _stat_value(path, COST_KEY)
+        if cost is not None and (best is None or sup < best[0]):
+            best = (sup, cost)
+    return None if best is None else best[1]
+
+
+def estimate_mem(results_dir: Path, info: DataInfo, cfg: GridConfig) -> Optional[int]:
+    """mine_peak_rss_bytes of an earlier STAT of cfg, None without one."""
+    exact = results_dir / build_stat_name(cfg.alg, info, cfg.sup, cfg.max_elts)
+    return _stat_value(exact, MEM_KEY) if exact.is_file() else None
+
+
+def unknown_mem(input_bytes: int) -> int:
+    # memory assumed for a configuration without history
+    return UNKNOWN_MEM_FACTOR * input_bytes
+
+
+def order_by_cost(configs: List[GridConfig], costs: Dict[GridConfig, Optional[int]]) -> List[GridConfig]:
+    # unknown cost first (lowest sup first), then known cost descending
+    return sorted(configs, key=lambda c: (costs.get(c) is not None, -(costs.get(c) or 0), c.sup))
+
+
+def _child(run: Callable[[GridConfig], None], cfg: GridConfig) -> None:
+    try:
+        run(cfg)
+    except BaseException:
+        traceback.print_exc()
+        sys.stderr.flush()
+        raise SystemExit(1)
+
+
+def run_configs(
+    configs: List[GridConfig],
+    run: Callable[[GridConfig], None],
+    jobs: int = 1,
+    mem_budget: Optional[int] = None,
+    costs: Optional[Dict[GridConfig, Optional[int]]] = None,
+    mems: Optional[Dict[GridConfig, Optional[int]]] = None,
+    default_mem: int = 0,
+) -> List[GridConfig]:
+    """
+    Runs every configuration (run(cfg)), most expensive first, and returns
+    the ones that failed; a failure does not stop the others. jobs > 1 forks
+    one process per configuration, at most `jobs` at a time and, with
+    mem_budget (bytes), at most that much estimated memory at a time (a
+    configuration larger than the budget runs alone). Memory is mems[cfg]
+    (estimate_mem), default_mem where it is None or missing (unknown_mem).
+    """
+    costs = costs or {}
+    mems = mems or {}
+    pending = order_by_cost(configs, costs)
+    failed: List[GridConfig] = []
+
+    if jobs <= 1 or "fork" not in multiprocessing.get_all_start_methods():
+        for cfg in pending:
+            try:
+                run(cfg)
+            except Exception:
+                traceback.print_exc()
+                failed.append(cfg)
+        return failed
+
+    ctx = multiprocessing.get_context("fork")
+    running = {}  # sentinel -> (process, config, memory estimate)
+
+    def mem(cfg: GridConfig) -> int:
+        m = mems.get(cfg)
+        return default_mem if m is None else m
+
+    while pending or running:
+        in_use = sum(m for _, _, m in running.values())
+        while pending and len(running) < jobs:
+            # first pending config that fits; else wait for a slot to free up
+            fit = next((c for c in pending
+                        if not running or mem_budget is None or in_use + mem(c) <= mem_budget), None)
+            if fit is None:
+                break
+            pending.remove(fit)
+            sys.stdout.flush()  # else the child inherits (and flushes) buffered output
+            p = ctx.Process(target=_child, args=(run, fit))
+            p.start()
+            running[p.sentinel] = (p, fit, mem(fit))
+            in_use += mem(fit)
+
+        for sentinel in multiprocessing.connection.wait(list(running)):
+            p, cfg, _ = running.pop(sentinel)
+            p.join()
+            if p.exitcode != 0:
+                failed.append(cfg)
+    return failed
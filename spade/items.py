@@ -0,0 +1,26 @@
+"""
+Dense integer item codes for the mining core.
+
+The readers keep items as their SPMF/CSV labels ("3032"). encode_items
+renumbers them 0..I-1 so patterns are tuples of small ints: cheaper to hash,
+compare and store. Labels are only looked up again when a pattern is
+formatted (spade.pattern.format_pattern, i.e. the OUT writer).
+
+Codes follow label order, so the mining order and OUT files are exactly
+those of label items. The class joins do not reach every frequent pattern,
+and which ones they reach depends on the item order, so the codes are not
+renumbered in any other order (by support, say): that would change the
+pattern set, not just its order.
+"""
+from __future__ import annotations
+from typing import List, Tuple
+
+from .vertical import VerticalDB
+
+
+def encode_items(vdb: VerticalDB) -> Tuple[VerticalDB, List[str]]:
+    """
+    Returns (vertical DB keyed by item code, labels) with labels[code] = label.
+    """
+    labels = sorted(vdb)
+    return {code: vdb[it] for code, it in enumerate(labels)}, labels
@@ -1,72 +1,218 @@
 from __future__ import annotations
-from typing import List, Tuple
+from array import array
+from bisect import bisect_left
+from typing import Optional
 
-Tid = Tuple[int, int]  # (sid, eid)
+from . import tidlist as _tidlist
+from .tidlist import Tidlist, EID_BITS, EID_MASK, assert_sorted, sids_weight
+from .vertical import support
 
 
-def i_join(t1: List[Tid], t2: List[Tid]) -> List[Tid]:
+# Returned by the *_minsup joins instead of a tidlist whose support is below minsup.
+INFREQUENT = None
+
+# Keys of t2 scanned between two early-abandon checks.
+ABANDON_CHUNK = 1024
+
+# Sids of t1 the S-join merge steps over one by one before it bisects.
+GALLOP_STEPS = 8
+
+# abandoned_len: full join lengths instead of upper bounds (run_and_stat --exactJoinLen)
+EXACT_ABANDONED_LEN = False
+
+
+def i_join(t1: Tidlist, t2: Tidlist) -> Tidlist:
     """
     I-step (E-join): same event => intersection on (sid,eid).
-    Both lists are assumed to be sortable; we do a merge-intersection (no set).
-    """
-    a = sorted(t1)
-    b = sorted(t2)
-    i = j = 0
-    out: List[Tid] = []
-    while i < len(a) and j < len(b):
-        if a[i] == b[j]:
-            out.append(a[i])
-            i += 1
-            j += 1
-        elif a[i] < b[j]:
-            i += 1
-        else:
-            j += 1
-    return out
+    Works on packed sid<<32|eid keys: equal keys <=> equal (sid, eid).
+    Inputs must be sorted (Tidlist invariant); scanning b in order keeps the
+    result sorted, so nothing is sorted here. Support is computed on the way out
+    and cached on the result.
+    """
+    if _tidlist.DEBUG_CHECKS:
+        assert_sorted(t1, t2)
+    in_a = set(t1.keys)
+    out = [k for k in t2.keys if k in in_a]
+    return Tidlist(array("q", out), sup=sids_weight({k >> EID_BITS for k in out}))
 
 
-def s_join(t1: List[Tid], t2: List[Tid]) -> List[Tid]:
+def s_join(t1: Tidlist, t2: Tidlist) -> Tidlist:
     """
     S-step (temporal join): new event after old one.
     Returns (sid, eid2) such that exists eid1 in t1 for same sid with eid1 < eid2.
 
-    Implementation: streaming by sid (no dict/sid-index build).
-    Assumes nothing besides sortability.
+    Implementation: t1.first_keys() holds the first key of t1 per sid (= minimal
+    eid1, keys are sorted) and is cached on t1 for all the S-joins it is the
+    left side of; then one merge pass of it with t2 (_s_merge): since sid is
+    the high half of the key, key2 > first_key1 <=> same sid and eid2 > min_eid1.
+    Relies on the sorted Tidlist invariant; the output is a subsequence of t2,
+    hence sorted too.
     """
-    a = sorted(t1)  # (sid,eid1)
-    b = sorted(t2)  # (sid,eid2)
+    if _tidlist.DEBUG_CHECKS:
+        assert_sorted(t1, t2)
+    return _s_merge(t1.first_keys(), t2.keys, 0)
 
-    out: List[Tid] = []
-    i = j = 0
 
-    while i < len(a) and j < len(b):
-        sid1, eid1 = a[i]
-        sid2, eid2 = b[j]
-
-        if sid1 < sid2:
-            # advance in a to catch up sid
-            i += 1
-            continue
-        if sid2 < sid1:
-            # advance in b to catch up sid
-            j += 1
-            continue
-
-        # same sid: collect all eid1 for this sid and all eid2 for this sid
-        sid = sid1
-
-        # get minimal eid1 in this sid (if there are multiple, any smaller works for condition eid1 < eid2)
-        min_eid1 = eid1
-        i += 1
-        while i < len(a) and a[i][0] == sid:
-            if a[i][1] < min_eid1:
-                min_eid1 = a[i][1]
+def _s_merge(first_keys, b, minsup: int) -> Optional[Tidlist]:
+    """
+    Merge pass of s_join over the first keys of t1 and the keys b of t2, both
+    in sid order: b is walked key by key, t1 advances to the sid of the
+    current key (linearly, then by bisection past GALLOP_STEPS sids). Every
+    sid of t1 adds at most one result sid, so the join is abandoned
+    (INFREQUENT) once found + (sids of t1 left) * MAX_WEIGHT < minsup.
+    """
+    na = len(first_keys)
+    if not na:
+        return INFREQUENT if minsup > 0 else Tidlist(sup=0)
+    weights = _tidlist.SID_WEIGHTS
+    max_weight = _tidlist.MAX_WEIGHT
+    out = []
+    append = out.append
+    found = 0
+    i = 0
+    f = first_keys[0]
+    nxt = (f | EID_MASK) + 1  # first key of the next sid
+    last = -1                 # first key of t1 whose sid is in out
+    for k in b:
+        if k >= nxt:
+            # k is in a later sid: move to the first sid of t1 not before it
+            ks = k & ~EID_MASK
             i += 1
+            stop = i + GALLOP_STEPS
+            while i < na and first_keys[i] < ks:
+                i += 1
+                if i == stop:
+                    i = bisect_left(first_keys, ks, i)
+                    break
+            if i == na or found + (na - i) * max_weight < minsup:
+                break
+            f = first_keys[i]
+            nxt = (f | EID_MASK) + 1
+        if k > f:
+            append(k)
+            if f != last:
+                last = f
+                found += 1 if weights is None else weights[f >> EID_BITS]
+    if found < minsup:
+        return INFREQUENT
+    return Tidlist(array("q", out), sup=found)
+
+
+def _count_new_sids(part, last_sid: int) -> int:
+    # support added by part: its sids except the one already counted
+    sids = {k >> EID_BITS for k in part}
+    sids.discard(last_sid)
+    return sids_weight(sids)
+
+
+def i_join_minsup(t1: Tidlist, t2: Tidlist, minsup: int) -> Optional[Tidlist]:
+    """
+    Early-abandon i_join: returns the joined tidlist if its support >= minsup,
+    otherwise INFREQUENT. t2 is scanned in chunks; after each chunk the join
+    gives up once found + (keys of t1 still ahead) * MAX_WEIGHT < minsup: every
+    new result sid needs at least one key of t1 at or after the scan position.
+    """
+    if _tidlist.DEBUG_CHECKS:
+        assert_sorted(t1, t2)
+    if support(t1) < minsup or support(t2) < minsup:
+        return INFREQUENT
+    a = t1.keys
+    b = t2.keys
+    in_a = set(a)
+    na = len(a)
+
+    out = array("q")
+    found = 0       # distinct sids in out
+    last_sid = -1   # sid of the last key in out
+    n = len(b)
+    for lo in range(0, n, ABANDON_CHUNK):
+        hi = lo + ABANDON_CHUNK
+        part = [k for k in b[lo:hi] if k in in_a]
+        if part:
+            found += _count_new_sids(part, last_sid)
+            last_sid = part[-1] >> EID_BITS
+            out.extend(part)
+        if found < minsup and (
+            hi >= n or found + (na - bisect_left(a, b[hi])) * _tidlist.MAX_WEIGHT < minsup
+        ):
+            return INFREQUENT
+    return Tidlist(out, sup=found)
+
+
+def s_join_minsup(t1: Tidlist, t2: Tidlist, minsup: int) -> Optional[Tidlist]:
+    """
+    Early-abandon s_join: same result as s_join when its support >= minsup,
+    otherwise INFREQUENT. The merge pass stops as soon as the sids of t1
+    still ahead (each worth at most MAX_WEIGHT) cannot reach minsup.
+    """
+    if _tidlist.DEBUG_CHECKS:
+        assert_sorted(t1, t2)
+    if support(t1) < minsup or support(t2) < minsup:
+        return INFREQUENT
+    return _s_merge(t1.first_keys(), t2.keys, minsup)
+
+
+def i_join_len(t1: Tidlist, t2: Tidlist) -> int:
+    """
+    len(i_join(t1, t2)) without building the result: the STAT length of the
+    joins i_join_minsup abandons, with EXACT_ABANDONED_LEN.
+    """
+    return len(set(t1.keys).intersection(t2.keys))
+
+
+def s_join_len(t1: Tidlist, t2: Tidlist) -> int:
+    """len(s_join(t1, t2)), for EXACT_ABANDONED_LEN (as i_join_len)."""
+    return len(_s_merge(t1.first_keys(), t2.keys, 0))
+
+
+def abandoned_len(step: str, t1: Tidlist, t2: Tidlist) -> int:
+    """
+    Tidlist length the STAT counts for an abandoned I- or S-join (step "I" or
+    "S") of t1 with t2: an upper bound of the full join length read off the
+    inputs (min(len(t1), len(t2)) for I, len(t2) for S, the result being a
+    subset of t2), or the full join length itself with EXACT_ABANDONED_LEN,
+    which costs a second, complete scan of the inputs (debug).
+    """
+    if EXACT_ABANDONED_LEN:
+        return i_join_len(t1, t2) if step == "I" else s_join_len(t1, t2)
+    return min(len(t1), len(t2)) if step == "I" else len(t2)
+
+
+def set_exact_abandoned_len(enabled: bool) -> None:
+    global EXACT_ABANDONED_LEN
+    EXACT_ABANDONED_LEN = enabled
 
-        # now process all eid2 for this sid
-        while j < len(b) and b[j][0] == sid:
-            if b[j][1] > min_eid1:
-                out.append(b[j])
-            j += 1
 
-    return out
+# engines over Tidlist (run_and_stat --joinEngine); "bitmap" binds the joins
+# of the bitmap representation instead (spade.bitmap, --repr bitmap)
+TIDLIST_ENGINES = ("python", "numpy")
+JOIN_ENGINES = TIDLIST_ENGINES + ("bitmap",)
+_PYTHON_JOINS = (i_join, s_join, i_join_minsup, s_join_minsup, i_join_len, s_join_len)
+
+# name of the engine currently bound (worker processes re-select it)
+ENGINE = "python"
+
+
+def set_join_engine(name: str) -> None:
+    """
+    Selects the implementation behind spade.join.i_join / s_join (and their
+    *_minsup and *_len variants) for the whole run.
+    The mining core calls them as join.i_join(...), so rebinding here is enough.
+    "numpy" needs NumPy installed (optional dependency).
+    """
+    global i_join, s_join, i_join_minsup, s_join_minsup, i_join_len, s_join_len, ENGINE
+    if name == "python":
+        i_join, s_join, i_join_minsup, s_join_minsup, i_join_len, s_join_len = _PYTHON_JOINS
+    elif name == "numpy":
+        from . import join_numpy
+        i_join, s_join = join_numpy.i_join, join_numpy.s_join
+        i_join_minsup, s_join_minsup = join_numpy.i_join_minsup, join_numpy.s_join_minsup
+        i_join_len, s_join_len = join_numpy.i_join_len, join_numpy.s_join_len
+    elif name == "bitmap":
+        from . import bitmap
+        i_join, s_join = bitmap.i_join, bitmap.s_join
+        i_join_minsup, s_join_minsup = bitmap.i_join_minsup, bitmap.s_join_minsup
+        i_join_len, s_join_len = bitmap.i_join_len, bitmap.s_join_len
+    else:
+        raise ValueError(f"Unknown join engine: {name} (expected one of {JOIN_ENGINES})")
+    ENGINE = name
@@ -0,0 +1,97 @@
+"""
+NumPy join engine: same contract and byte-identical results as spade.join,
+vectorized over the packed sid<<32|eid keys (viewed zero-copy as int64).
+Selected per run with spade.join.set_join_engine("numpy").
+"""
+from __future__ import annotations
+from array import array
+from typing import Optional
+
+import numpy as np
+
+from . import tidlist as _tidlist
+from .join import INFREQUENT
+from .tidlist import Tidlist, EID_BITS, assert_sorted
+from .vertical import support
+
+
+def _view(t: Tidlist) -> np.ndarray:
+    # sorted by the Tidlist invariant, so no np.sort
+    if _tidlist.DEBUG_CHECKS:
+        assert_sorted(t)
+    if not len(t):
+        return np.empty(0, dtype=np.int64)
+    return np.frombuffer(t.keys, dtype=np.int64)
+
+
+def _to_tidlist(keys: np.ndarray) -> Tidlist:
+    # keys are sorted: support = number of sid changes + 1
+    sids = keys >> EID_BITS
+    if _tidlist.SID_WEIGHTS is not None and len(keys):
+        # weighted sids (spade.dedup): sum over the first key of every sid
+        starts = np.r_[True, sids[1:] != sids[:-1]]
+        weights = np.frombuffer(_tidlist.SID_WEIGHTS, dtype=np.int64)
+        sup = int(weights[sids[starts]].sum())
+    else:
+        sup = int(np.count_nonzero(sids[1:] != sids[:-1])) + 1 if len(keys) else 0
+    return Tidlist(array("q", keys.astype(np.int64, copy=False).tobytes()), sup=sup)
+
+
+def i_join(t1: Tidlist, t2: Tidlist) -> Tidlist:
+    """
+    I-step: keys of the shorter list looked up in the longer one with searchsorted.
+    """
+    a = _view(t1)
+    b = _view(t2)
+    if len(a) > len(b):
+        a, b = b, a
+    if not len(a):
+        return Tidlist(sup=0)
+
+    pos = np.searchsorted(b, a)
+    pos[pos == len(b)] = 0
+    return _to_tidlist(a[b[pos] == a])
+
+
+def s_join(t1: Tidlist, t2: Tidlist) -> Tidlist:
+    """
+    S-step: minimum key of t1 per sid (t1.first_keys()), then one vectorized
+    filter of t2: key2 > min_key1 of the same sid.
+    """
+    a = _view(t1)
+    b = _view(t2)
+    if not len(a) or not len(b):
+        return Tidlist(sup=0)
+
+    # first key per sid, cached on t1 (Tidlist.first_keys) across its S-joins
+    first_key = np.frombuffer(t1.first_keys(), dtype=np.int64)
+    first_sid = first_key >> EID_BITS
+
+    sid_b = b >> EID_BITS
+    pos = np.searchsorted(first_sid, sid_b)
+    pos[pos == len(first_sid)] = 0
+    keep = (first_sid[pos] == sid_b) & (b > first_key[pos])
+    return _to_tidlist(b[keep])
+
+
+def i_join_minsup(t1: Tidlist, t2: Tidlist, minsup: int) -> Optional[Tidlist]:
+    # vectorized joins cannot stop half-way; only the support precheck is early
+    if support(t1) < minsup or support(t2) < minsup:
+        return INFREQUENT
+    tl = i_join(t1, t2)
+    return tl if tl.sup >= minsup else INFREQUENT
+
+
+def s_join_minsup(t1: Tidlist, t2: Tidlist, minsup: int) -> Optional[Tidlist]:
+    if support(t1) < minsup or support(t2) < minsup:
+        return INFREQUENT
+    tl = s_join(t1, t2)
+    return tl if tl.sup >= minsup else INFREQUENT
+
+
+def i_join_len(t1: Tidlist, t2: Tidlist) -> int:
+    return len(i_join(t1, t2))
+
+
+def s_join_len(t1: Tidlist, t2: Tidlist) -> int:
+    return len(s_join(t1, t2))
@@ -2,15 +2,17 @@ from __future__ import annotations
 from typing import Dict, List, Tuple, Callable
 from collections import defaultdict
 
-from .node import Node
-from .vertical import Tid
-from .pattern import Pattern
+from .node import Node, by_sort_key
+from .tidlist import Tidlist
+from .pattern import Pattern, Item
 from .pattern_utils import split_last_step, pattern_sort_key
-from .candidates import join_in_class
+from .candidates import join_class
 from .dspade import StatsCounter
 from .f2 import gen_f2
+from .cmap import CoocMap
 
 import gc
+import heapq
 
 
 def _group_by_prefix(nodes: List[Node]) -> Dict[Pattern, List[Node]]:
@@ -20,41 +22,50 @@ def _group_by_prefix(nodes: List[Node]) -> Dict[Pattern, List[Node]]:
         classes[pref].append(n)
 
     for pref in list(classes.keys()):
-        classes[pref] = sorted(classes[pref], key=lambda x: pattern_sort_key(x.pattern))
+        classes[pref] = sorted(classes[pref], key=by_sort_key)
 
     return dict(sorted(classes.items(), key=lambda kv: pattern_sort_key(kv[0])))
 
 
-def _f1_nodes_to_f2_nodes(f1_nodes: List[Node], minsup: int, stats: StatsCounter | None = None) -> List[Node]:
-    f1_tuples: List[Tuple[str, List[Tid], int]] = []
+def _f1_nodes_to_f2_nodes(
+    f1_nodes: List[Node],
+    minsup: int,
+    stats: StatsCounter | None = None,
+    workers: int = 1,
+    max_elts: int | None = None,
+) -> List[Node]:
+    f1_tuples: List[Tuple[Item, Tidlist, int]] = []
     for n in sorted(f1_nodes, key=lambda x: x.pattern[0][0]):
         item = n.pattern[0][0]
         f1_tuples.append((item, n.tidlist, n.sup))
-    f2 = gen_f2(f1_tuples, minsup, stats=stats)
-    return [Node(pattern=p, tidlist=tl) for (p, tl, _sup) in f2]
+    f2 = gen_f2(f1_tuples, minsup, stats=stats, workers=workers, max_elts=max_elts)
+    return [Node(pattern=p, tidlist=tl, sup=sup) for (p, tl, sup) in f2]
 
 
 def maxelts_dspade(
     f1_nodes: List[Node],
-    item_tidlists: Dict[str, List[Tid]],
+    item_tidlists: Dict[Item, Tidlist],
     minsup: int,
     max_elts: int,
     on_discover: Callable[[Node], None] | None = None,
     stats: StatsCounter | None = None,
+    workers: int = 1,
+    use_cmap: bool = False,
 ) -> List[Node]:
     """
     SPADE-like DFS with max_elts constraint.
-    API unchanged.
+    API unchanged. workers > 1: F2 is built in a process pool (see gen_f2).
+    use_cmap: co-occurrence pruning before the joins (spade.cmap).
     """
     discovered: List[Node] = []
 
     # F1 (filter)
-    f1_sorted = sorted(f1_nodes, key=lambda x: pattern_sort_key(x.pattern))
+    f1_sorted = sorted(f1_nodes, key=by_sort_key)
     for n in f1_sorted:
         if n.elts > max_elts:
             continue
         if stats:
-            stats.add_attempted(n.length, n.len_tidlist)
+            stats.add_attempted(n.length, n.stored_len)
             stats.add_candidate(n)
         discovered.append(n)
         if on_discover:
@@ -62,11 +73,11 @@ def maxelts_dspade(
         if stats:
             stats.add_discovered(n)
 
-    # F2 (filter)
-    f2_nodes_all = _f1_nodes_to_f2_nodes(f1_nodes, minsup, stats=stats)
-    f2_nodes = [n for n in f2_nodes_all if n.elts <= max_elts]
+    # F2 (max_elts checked before the joins)
+    f2_nodes = _f1_nodes_to_f2_nodes(f1_nodes, minsup, stats=stats, workers=workers, max_elts=max_elts)
+    cmap = CoocMap.from_f2(f2_nodes) if use_cmap else None
 
-    for n in sorted(f2_nodes, key=lambda x: pattern_sort_key(x.pattern)):
+    for n in sorted(f2_nodes, key=by_sort_key):
         if stats:
             stats.add_candidate(n)
         discovered.append(n)
@@ -78,30 +89,19 @@ def maxelts_dspade(
     classes = _group_by_prefix(f2_nodes)
 
     def recurse(class_nodes: List[Node]):
-        # generate next level candidates within this class via pairwise joins
-        next_level: List[Node] = []
-        for i in range(len(class_nodes)):
-            for j in range(i + 1, len(class_nodes)):
-                cand = join_in_class(class_nodes[i], class_nodes[j], minsup, stats=stats)
-                # filter max_elts
-                cand = [c for c in cand if c.elts <= max_elts]
-                if stats:
-                    for c in cand:
-                        stats.add_candidate(c)
-                next_level.extend(cand)
-
-        if not next_level:
-            return
+        # generate next level candidates within this class via pairwise joins,
+        # already split into the sub-classes below each member
+        buckets = join_class(class_nodes, minsup, stats=stats, cmap=cmap, max_elts=max_elts)
+        if stats:
+            for bucket in buckets:
+                for c in bucket:
+                    stats.add_candidate(c)
 
-        # discover next_level nodes (frequent by construction)
-        next_level = sorted(next_level, key=lambda x: pattern_sort_key(x.pattern))
-        uniq = {}
-        for n in next_level:
-            if n.pattern not in uniq:
-                uniq[n.pattern] = n
-        next_level = [uniq[p] for p in sorted(uniq.keys(), key=pattern_sort_key)]
+        if not any(buckets):
+            return
 
-        for n in next_level:
+        # discover next_level nodes (frequent by construction); buckets are sorted
+        for n in heapq.merge(*buckets, key=by_sort_key):
             discovered.append(n)
             if on_discover:
                 on_discover(n)
@@ -109,9 +109,9 @@ def maxelts_dspade(
                 stats.add_discovered(n)
 
         # recurse into sub-classes
-        sub = _group_by_prefix(next_level)
-        for _pref, sub_nodes in sub.items():
-            recurse(sub_nodes)
+        for sub_nodes in buckets:
+            if sub_nodes:
+                recurse(sub_nodes)
 
         if stats is not None and getattr(stats, "gc_enabled", False):
             gc.collect()
@@ -0,0 +1,51 @@
+"""
+Resident memory of the current process (Linux /proc; None elsewhere).
+
+run_and_stat resets the peak before a run and records how far the peak rose
+above the resident size at its start (STAT mine_peak_rss_bytes): the memory
+the run needs on top of the loaded input, which spade.grid budgets.
+"""
+from __future__ import annotations
+from typing import Optional
+
+
+def _status_bytes(field: str) -> Optional[int]:
+    try:
+        with open("/proc/self/status", encoding="ascii") as f:
+            for line in f:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1]) * 1024  # kB
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+def rss() -> Optional[int]:
+    return _status_bytes("VmRSS")
+
+
+def peak_rss() -> Optional[int]:
+    return _status_bytes("VmHWM")
+
+
+def reset_peak_rss() -> None:
+    # peak := current resident size; without it the peak may predate the run
+    # (an over-estimate, which is the safe side for a budget)
+    try:
+        with open("/proc/self/clear_refs", "w", encoding="ascii") as f:
+            f.write("5")
+    except OSError:
+        pass
+
+
+class PeakTracker:
+    """Rise of the peak resident size above its value at construction."""
+    def __init__(self):
+        reset_peak_rss()
+        self.start = rss()
+
+    def rise(self) -> Optional[int]:
+        peak = peak_rss()
+        if peak is None or self.start is None:
+            return None
+        return max(0, peak - self.start)
@@ -1,21 +1,62 @@
 from __future__ import annotations
-from dataclasses import dataclass
-from typing import List, Tuple
+from dataclasses import dataclass, field
+from operator import attrgetter
 from .pattern import Pattern, pattern_len, num_elts
-from .vertical import Tid, support
+from .pattern_utils import pattern_sort_key
+from .tidlist import Tidlist, occurrences
+from .vertical import support
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Node:
     pattern: Pattern
-    tidlist: List[Tid]
+    tidlist: Tidlist
+    # number of distinct sids (weighted, see spade.dedup); taken once from the
+    # tidlist (joins precompute it)
+    sup: int = -1
+    # pattern_sort_key(pattern), computed on first use
+    _sort_key: tuple | None = field(default=None, init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        if self.sup < 0:
+            object.__setattr__(self, "sup", support(self.tidlist))
 
     @property
-    def sup(self) -> int:
-        return support(self.tidlist)
+    def sort_key(self) -> tuple:
+        key = self._sort_key
+        if key is None:
+            key = pattern_sort_key(self.pattern)
+            object.__setattr__(self, "_sort_key", key)
+        return key
 
     @property
     def len_tidlist(self) -> int:
-        return len(self.tidlist)
+        # occurrences in the input: the same with deduplicated sequences
+        return occurrences(self.tidlist)
+
+    @property
+    def stored_len(self) -> int:
+        # entries actually held: smaller than len_tidlist for diffset-backed nodes
+        return self.tidlist.stored_len
+
+    @property
+    def length(self) -> int:
+        return pattern_len(self.pattern)
+
+    @property
+    def elts(self) -> int:
+        return num_elts(self.pattern)
+
+
+@dataclass(frozen=True, slots=True)
+class PatternRow:
+    """
+    A discovered pattern without its tidlist: the Node fields the OUT and STAT
+    writers read. dspade workers send these back instead of tidlists.
+    """
+    pattern: Pattern
+    len_tidlist: int
+    stored_len: int
+    sup: int
 
     @property
     def length(self) -> int:
@@ -24,3 +65,7 @@ class Node:
     @property
     def elts(self) -> int:
         return num_elts(self.pattern)
+
+
+# sort key for nodes: cached Node.sort_key
+by_sort_key = attrgetter("sort_key")
@@ -0,0 +1,41 @@
+"""
+Process pools for the mining core (dspade --workers, parallel F2).
+Workers re-select the join engine (and its abandoned-length mode), debug checks, item labels and sid
+weights of the parent (the labels fix the pattern sort order), then run the caller's
+initializer, which stores the shared inputs in a module global: under fork
+they are inherited copy-on-write, elsewhere pickled once per worker.
+"""
+from __future__ import annotations
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+
+from . import join
+from . import pattern as _pattern
+from . import tidlist as _tidlist
+
+
+def _context():
+    if "fork" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("fork")
+    return multiprocessing.get_context()
+
+
+def _init(join_engine, exact_len, debug_checks, item_labels, sid_weights, initializer, initargs):
+    join.set_join_engine(join_engine)
+    join.set_exact_abandoned_len(exact_len)
+    _tidlist.set_debug_checks(debug_checks)
+    _pattern.set_item_labels(item_labels)
+    _tidlist.set_sid_weights(sid_weights)
+    initializer(*initargs)
+
+
+def process_pool(workers: int, initializer, initargs: tuple) -> ProcessPoolExecutor:
+    return ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=_context(),
+        initializer=_init,
+        initargs=(
+            join.ENGINE, join.EXACT_ABANDONED_LEN, _tidlist.DEBUG_CHECKS, _pattern.ITEM_LABELS, _tidlist.SID_WEIGHTS,
+            initializer, initargs,
+        ),
+    )
@@ -1,10 +1,41 @@
 from __future__ import annotations
 from dataclasses import dataclass
-from typing import Tuple
+from typing import List, Optional, Tuple
 
-Event = Tuple[str, ...]
+Item = int  # dense item code (spade.items); label strings work as well
+Event = Tuple[Item, ...]
 Pattern = Tuple[Event, ...]
 
+# labels[code] of the current run (set from spade.items.encode_items);
+# None: items are printed as they are
+ITEM_LABELS: Optional[List[str]] = None
+
+# Token ranks behind pattern_utils.pattern_sort_key, derived from the labels:
+# SORT_RANKS[kind][code] is the rank of label + (" ", "}->{", "}>")[kind]
+# among all such strings.
+SORT_RANKS: Optional[Tuple[List[int], List[int], List[int]]] = None
+
+_SEPARATORS = (" ", "}->{", "}>")
+
+
+def set_item_labels(labels: Optional[List[str]]) -> None:
+    # labels are sorted (codes in label order, spade.items)
+    global ITEM_LABELS, SORT_RANKS
+    ITEM_LABELS = labels
+    if labels is None:
+        SORT_RANKS = None
+        return
+
+    tokens = sorted(
+        (lab + sep, kind, code)
+        for code, lab in enumerate(labels)
+        for kind, sep in enumerate(_SEPARATORS)
+    )
+    ranks = ([0] * len(labels), [0] * len(labels), [0] * len(labels))
+    for rank, (_, kind, code) in enumerate(tokens):
+        ranks[kind][code] = rank
+    SORT_RANKS = ranks
+
 def pattern_len(p: Pattern) -> int:
     return len(p)
 
@@ -12,9 +43,14 @@ def num_elts(p: Pattern) -> int:
     return sum(len(ev) for ev in p)
 
 def format_pattern(p: Pattern) -> str:
-    # OUT-friendly: <{A B}->{C}->{D E}>
+    # OUT-friendly: <{A B}->{C}->{D E}>, item codes decoded to their labels
+    labels = ITEM_LABELS
     parts = []
     for ev in p:
-        parts.append("{"+ " ".join(ev) +"}")
+        if labels is None:
+            names = map(str, ev)
+        else:
+            names = [labels[it] for it in ev]
+        parts.append("{"+ " ".join(names) +"}")
     return "<" + "->".join(parts) + ">"
 
@@ -1,11 +1,12 @@
 from __future__ import annotations
 from typing import Tuple, Literal
-from .pattern import Pattern, Event, format_pattern
+from . import pattern as _pattern
+from .pattern import Pattern, Event, Item
 
 StepType = Literal["I", "S"]
 
 
-def split_last_step(p: Pattern) -> Tuple[Pattern, StepType, str]:
+def split_last_step(p: Pattern) -> Tuple[Pattern, StepType, Item]:
     """
     SPADE equivalence-class key:
     returns (prefix, step_type, atom_item)
@@ -28,6 +29,33 @@ def split_last_step(p: Pattern) -> Tuple[Pattern, StepType, str]:
         return prefix, "S", atom
 
 
-def pattern_sort_key(p: Pattern) -> str:
-    # Deterministic ordering for classes/nodes
-    return format_pattern(p)
+def pattern_sort_key(p: Pattern) -> tuple:
+    """
+    Deterministic ordering for classes/nodes: exactly the order of the
+    format_pattern strings, without building them.
+
+    "<{A B}->{C}>" is the concatenation of one token per item, "A ", "B}->{",
+    "C}>": label + " " inside an event, + "}->{" at the end of an event,
+    + "}>" at the end of the pattern. Labels never contain " " or "}", so no
+    token is a prefix of another and comparing the strings is comparing the
+    token sequences token by token. With item labels registered, tokens are
+    replaced by their precomputed rank (pattern.SORT_RANKS): a tuple of ints.
+    """
+    ranks = _pattern.SORT_RANKS
+    if not p:
+        return ()
+    last = len(p) - 1
+    key = []
+    if ranks is None:
+        for e, ev in enumerate(p):
+            names = [str(it) for it in ev]
+            key.extend(name + " " for name in names[:-1])
+            key.append(names[-1] + ("}>" if e == last else "}->{"))
+        return tuple(key)
+
+    inner, end, final = ranks
+    for e, ev in enumerate(p):
+        for it in ev[:-1]:
+            key.append(inner[it])
+        key.append((final if e == last else end)[ev[-1]])
+    return tuple(key)
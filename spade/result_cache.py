@@ -0,0 +1,96 @@
+"""
+Cache of finished runs for the grid scripts.
+
+OUT/STAT names (spade.naming) encode D/T/I but not the content of the
+input, so an existing file of the right name may come from another dataset
+or another version of the miner. A run is instead keyed by the SHA-256 of
+its input (spade.compiled.source_hash), alg, sup, maxElts, the options that
+change its OUT/STAT and ENGINE_VERSION. The manifest (JSON) maps each key
+to the files the run wrote, with their sizes and mtimes: a file edited or
+rewritten since is a miss. All of this is known before the input is read.
+"""
+from __future__ import annotations
+import hashlib
+import json
+import os
+import shutil
+from pathlib import Path
+from typing import Optional, Tuple
+
+# bump when a change alters the OUT or STAT files of some run
+ENGINE_VERSION = 6
+
+MANIFEST_NAME = ".result_cache.json"
+
+
+def run_key(source_hash: str, alg: str, sup: int, max_elts: Optional[int], options: dict) -> str:
+    payload = json.dumps({
+        "engine": ENGINE_VERSION,
+        "input": source_hash,
+        "alg": alg,
+        "sup": sup,
+        "maxElts": max_elts,
+        "options": options,
+    }, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _stamp(path: Path) -> list:
+    st = path.stat()
+    return [st.st_size, st.st_mtime_ns]
+
+
+class ResultCache:
+    """
+    Manifest of finished runs. derived entries come from a support sweep
+    (spade.sweep): same OUT, but a STAT with n/a counters.
+    """
+    def __init__(self, path: Path):
+        self.path = path
+        try:
+            self.entries = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            self.entries = {}
+
+    def lookup(self, key: str, derived_ok: bool = False) -> Optional[Tuple[Path, Path]]:
+        e = self.entries.get(key)
+        if e is None or (e["derived"] and not derived_ok):
+            return None
+        paths = (Path(e["out"]), Path(e["stat"]))
+        try:
+            if [_stamp(p) for p in paths] != e["stamps"]:
+                return None
+        except OSError:
+            return None
+        return paths
+
+    def record(self, key: str, out_path: Path, stat_path: Path, derived: bool = False) -> None:
+        paths = (out_path.resolve(), stat_path.resolve())
+        self.entries[key] = {
+            "out": str(paths[0]),
+            "stat": str(paths[1]),
+            "stamps": [_stamp(p) for p in paths],
+            "derived": derived,
+        }
+
+    def save(self) -> None:
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        tmp.write_text(json.dumps(self.entries, indent=1, sort_keys=True), encoding="utf-8")
+        tmp.replace(self.path)
+
+
+def link_into(cached: Path, results_dir: Path) -> Path:
+    """
+    results_dir/<name of cached>, the cached file itself or a symlink to it
+    (a copy where symlinks are not available).
+    """
+    target = results_dir / cached.name
+    if target.exists() and target.resolve() == cached.resolve():
+        return target
+    if target.is_symlink() or target.exists():
+        target.unlink()
+    try:
+        os.symlink(cached.resolve(), target)
+    except OSError:
+        shutil.copy2(cached, target)
+    return target
@@ -3,6 +3,7 @@ from dataclasses import asdict
 from typing import Optional, Dict
 from spade.stats import InputStats
 from spade.dspade import StatsCounter
+from spade.sweep import NOT_DERIVED
 
 def _fmt_float(x: float) -> str:
     return f"{x:.6f}"
@@ -18,7 +19,27 @@ def write_stat(
     time_write_s: float,
     total_time_s: float,
     stats_counter: StatsCounter,
+    join_engine: str = "python",
+    diffset_threshold: Optional[float] = None,
+    workers: int = 1,
+    f2_method: str = "join",
+    f2_cache: Optional[str] = None,
+    exact_join_len: bool = False,
+    cmap: bool = False,
+    distinct_sequences: Optional[int] = None,
+    projection: bool = False,
+    shared_load_s: Optional[float] = None,
+    mine_peak_rss_bytes: Optional[int] = None,
+    derived_from_sup: Optional[int] = None,
+    sweep_mine_s: Optional[float] = None,
 ) -> None:
+    # derived_from_sup: counters filtered from a run at that sup (spade.sweep);
+    # those in spade.sweep.NOT_DERIVED are written as n/a
+    derived = derived_from_sup is not None
+
+    def nd(v):
+        return "n/a" if derived else v
+
     # total time minus read time
     total_minus_read = total_time_s - time_read_s
 
@@ -44,16 +65,40 @@ def write_stat(
     lines.append(f"sup: {sup}")
     if max_elts is not None:
         lines.append(f"maxElts: {max_elts}")
+    lines.append(f"join_engine: {join_engine}")
+    lines.append(f"f2_method: {f2_method}")
+    lines.append(f"f2_cache: {f2_cache or 'off'}")
+    # tidlist length counted for abandoned joins (spade.join.abandoned_len)
+    lines.append(f"abandoned_len: {'exact' if exact_join_len else 'bound'}")
+    lines.append(f"workers: {workers}")
+    lines.append(f"diffsets: {'off' if diffset_threshold is None else diffset_threshold}")
+    lines.append(f"cmap: {'on' if cmap else 'off'}")
+    lines.append(f"projection: {'on' if projection else 'off'}")
+    # --dedup: supports are summed sid weights, tidlist counters are per distinct sequence
+    lines.append(f"dedup: {'off' if distinct_sequences is None else 'on'}")
+    if distinct_sequences is not None:
+        lines.append(f"distinct_sequences: {distinct_sequences}")
+    if derived:
+        lines.append(f"derived_from_sup: {derived_from_sup}")
+        lines.append(f"not_derived: {', '.join(NOT_DERIVED)}")
 
     # --- timings
     lines.append(f"time_read_s: {_fmt_float(time_read_s)}")
+    if shared_load_s is not None:
+        # grid run: the input was loaded once for all configurations (not in total_time_s)
+        lines.append(f"shared_load_s: {_fmt_float(shared_load_s)}")
     lines.append(f"time_mine_s: {_fmt_float(time_mine_s)}")
+    if sweep_mine_s is not None:
+        # mining time of the derived_from_sup run (not in total_time_s)
+        lines.append(f"sweep_mine_s: {_fmt_float(sweep_mine_s)}")
     lines.append(f"time_write_s: {_fmt_float(time_write_s)}")
     lines.append(f"total_time_minus_read_s: {_fmt_float(total_minus_read)}")
     lines.append(f"total_time_s: {_fmt_float(total_time_s)}")
+    # peak resident memory of the run above its start (spade.memory); pool workers not included
+    lines.append(f"mine_peak_rss_bytes: {'n/a' if mine_peak_rss_bytes is None else mine_peak_rss_bytes}")
 
     # --- max lengths
-    lines.append(f"max_candidate_length: {stats_counter.max_candidate_len}")
+    lines.append(f"max_candidate_length: {nd(stats_counter.max_candidate_len)}")
     lines.append(f"max_discovered_length: {stats_counter.max_discovered_len}")
 
     # --- summary counters
@@ -66,8 +111,12 @@ def write_stat(
     lines.append(f"total_discovered_sum_tidlist_len: {stats_counter.total_sum_tid_discovered()}")
 
     # --- attempted candidates (before minsup filtering)
-    lines.append(f"total_attempted_candidates: {stats_counter.total_attempted()}")
-    lines.append(f"total_attempted_sum_tidlist_len: {stats_counter.total_sum_tid_attempted()}")
+    lines.append(f"total_attempted_candidates: {nd(stats_counter.total_attempted())}")
+    lines.append(f"total_attempted_sum_tidlist_len: {nd(stats_counter.total_sum_tid_attempted())}")
+    lines.append(f"total_materialized_sum_tidlist_len: {nd(stats_counter.total_sum_tid_materialized())}")
+    lines.append(f"total_abandoned_joins: {nd(stats_counter.total_abandoned())}")
+    lines.append(f"total_count_rejected_pairs: {nd(stats_counter.total_count_rejected())}")
+    lines.append(f"total_pruned_by_cmap: {nd(stats_counter.total_pruned_cmap())}")
 
 
     # --- per length 1..max_discovered_len (+1 for candidates of length L+1)
@@ -92,8 +141,12 @@ def write_stat(
 
         att = stats_counter.attempted_by_len.get(k, 0)
         att_tid = stats_counter.sum_tid_attempted.get(k, 0)
-        lines.append(f"attempted_len_{k}: {att}")
-        lines.append(f"attempted_len_{k}_sum_tidlist_len: {att_tid}")
+        lines.append(f"attempted_len_{k}: {nd(att)}")
+        lines.append(f"attempted_len_{k}_sum_tidlist_len: {nd(att_tid)}")
+        lines.append(f"materialized_len_{k}_sum_tidlist_len: {nd(stats_counter.sum_tid_materialized.get(k, 0))}")
+        lines.append(f"abandoned_len_{k}: {nd(stats_counter.abandoned_by_len.get(k, 0))}")
+        lines.append(f"count_rejected_len_{k}: {nd(stats_counter.count_rejected_by_len.get(k, 0))}")
+        lines.append(f"pruned_by_cmap_len_{k}: {nd(stats_counter.pruned_cmap_by_len.get(k, 0))}")
 
 
     with open(path, "w", encoding="utf-8") as f:
@@ -1,6 +1,7 @@
 from __future__ import annotations
 from dataclasses import dataclass
-from statistics import mean, pstdev
+from fractions import Fraction
+from math import sqrt
 from typing import Dict, List, Tuple, Set
 from .io import Record
 
@@ -22,36 +23,66 @@ class InputStats:
     std_items_per_tx: float
 
 
+def _hist_mean_std(hist: Dict[int, int]) -> Tuple[float, float]:
+    # exact mean / population std from a {value: count} histogram
+    n = sum(hist.values())
+    s1 = sum(v * c for v, c in hist.items())
+    s2 = sum(v * v * c for v, c in hist.items())
+    if n < 2:
+        return float(Fraction(s1, n)), 0.0
+    var = Fraction(n * s2 - s1 * s1, n * n)
+    return float(Fraction(s1, n)), sqrt(var)
+
+
+def input_stats_from_histograms(
+    filename: str,
+    num_items: int,
+    tx_per_seq: Dict[int, int],
+    items_per_tx: Dict[int, int],
+) -> InputStats:
+    """
+    Builds InputStats from histograms ({events per sequence: count} and
+    {items per event: count}), so streaming readers never keep per-record lists.
+    """
+    if not tx_per_seq:
+        raise ValueError("No records loaded.")
+
+    tx_mean, tx_std = _hist_mean_std(tx_per_seq)
+    it_mean, it_std = _hist_mean_std(items_per_tx)
+
+    return InputStats(
+        filename=filename,
+        num_sequences=sum(tx_per_seq.values()),
+        num_transactions=sum(items_per_tx.values()),
+        num_distinct_items=num_items,
+
+        min_tx_per_seq=min(tx_per_seq),
+        max_tx_per_seq=max(tx_per_seq),
+        mean_tx_per_seq=tx_mean,
+        std_tx_per_seq=tx_std,
+
+        min_items_per_tx=min(items_per_tx),
+        max_items_per_tx=max(items_per_tx),
+        mean_items_per_tx=it_mean,
+        std_items_per_tx=it_std,
+    )
+
+
 def compute_input_stats(records: List[Record], filename: str) -> InputStats:
     if not records:
         raise ValueError("No records loaded.")
 
-    sids: Set[int] = set()
     all_items: Set[str] = set()
     tx_per_sid: Dict[int, int] = {}
-    items_per_tx: List[int] = []
+    items_per_tx: Dict[int, int] = {}
 
     for r in records:
-        sids.add(r.sid)
         tx_per_sid[r.sid] = tx_per_sid.get(r.sid, 0) + 1
-        items_per_tx.append(len(r.items))
+        items_per_tx[len(r.items)] = items_per_tx.get(len(r.items), 0) + 1
         all_items.update(r.items)
 
-    tx_counts = list(tx_per_sid.values())
-
-    return InputStats(
-        filename=filename,
-        num_sequences=len(sids),
-        num_transactions=len(records),
-        num_distinct_items=len(all_items),
-
-        min_tx_per_seq=min(tx_counts),
-        max_tx_per_seq=max(tx_counts),
-        mean_tx_per_seq=float(mean(tx_counts)),
-        std_tx_per_seq=float(pstdev(tx_counts)) if len(tx_counts) > 1 else 0.0,
+    tx_hist: Dict[int, int] = {}
+    for n in tx_per_sid.values():
+        tx_hist[n] = tx_hist.get(n, 0) + 1
 
-        min_items_per_tx=min(items_per_tx),
-        max_items_per_tx=max(items_per_tx),
-        mean_items_per_tx=float(mean(items_per_tx)),
-        std_items_per_tx=float(pstdev(items_per_tx)) if len(items_per_tx) > 1 else 0.0,
-    )
+    return input_stats_from_histograms(filename, len(all_items), tx_hist, items_per_tx)
@@ -0,0 +1,51 @@
+"""
+Support sweeps from a single run.
+
+Patterns frequent at sup s are frequent at every lower sup, and a pattern's
+generators (its two parents in the equivalence class) are at least as
+frequent as the pattern itself. So the run at the lowest sup of a sweep
+visits every pattern of the higher sups with the same tidlist, the same
+support and in the same relative order (children of a class are discovered
+in sort order before its sub-classes, levels in sort order for bspade):
+filtering its OUT rows on sup >= s gives the OUT of the run at s.
+
+Every frequent node is counted both as candidate and as discovered, so those
+counters follow from the filtered rows as well. The attempted, materialized,
+abandoned, count-rejected and cmap-pruned counters (and max_candidate_length,
+which includes attempted lengths) depend on which infrequent joins the run at s
+would have tried; they are not derived (NOT_DERIVED, written as n/a).
+"""
+from __future__ import annotations
+from typing import Dict, Iterable, List
+
+from .dspade import StatsCounter
+from .node import Node
+
+NOT_DERIVED = (
+    "max_candidate_length",
+    "total_attempted_candidates", "total_attempted_sum_tidlist_len",
+    "total_materialized_sum_tidlist_len", "total_abandoned_joins",
+    "total_count_rejected_pairs", "total_pruned_by_cmap",
+    "attempted_len_k", "attempted_len_k_sum_tidlist_len",
+    "materialized_len_k_sum_tidlist_len", "abandoned_len_k",
+    "count_rejected_len_k", "pruned_by_cmap_len_k",
+)
+
+
+class SupSweep:
+    """
+    Derived counters of the higher sups of a sweep: add() every node
+    discovered by the run at the lowest sup, in discovery order.
+    """
+    def __init__(self, sups: Iterable[int]):
+        self.sups = sorted(sups)
+        self.stats: Dict[int, StatsCounter] = {s: StatsCounter() for s in self.sups}
+
+    def add(self, n: Node) -> List[int]:
+        # sups at which n is frequent (ascending): its OUT row belongs to those files
+        hits = [s for s in self.sups if n.sup >= s]
+        for s in hits:
+            st = self.stats[s]
+            st.add_candidate(n)
+            st.add_discovered(n)
+        return hits
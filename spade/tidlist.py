@@ -0,0 +1,160 @@
+from __future__ import annotations
+from array import array
+from typing import Iterable, Iterator, Tuple
+
+Tid = Tuple[int, int]  # (sid, eid)
+
+EID_BITS = 32
+EID_MASK = (1 << EID_BITS) - 1
+MAX_SID = (1 << 31) - 1
+
+# Debug mode: joins verify the sorted invariant of their inputs (O(n) per join).
+DEBUG_CHECKS = False
+
+
+def set_debug_checks(enabled: bool) -> None:
+    global DEBUG_CHECKS
+    DEBUG_CHECKS = enabled
+
+
+# Multiplicity of every sid when identical sequences were collapsed
+# (spade.dedup): supports are sums of sid weights. None = every sid counts 1.
+SID_WEIGHTS: array | None = None
+MAX_WEIGHT = 1
+
+
+def set_sid_weights(weights: array | None) -> None:
+    global SID_WEIGHTS, MAX_WEIGHT
+    SID_WEIGHTS = weights
+    MAX_WEIGHT = max(weights) if weights else 1
+
+
+def sids_weight(sids) -> int:
+    # support of a set of distinct sids
+    w = SID_WEIGHTS
+    if w is None:
+        return len(sids)
+    return sum(map(w.__getitem__, sids))
+
+
+def occurrences(t) -> int:
+    # occurrences in the original database: len(t) unless sids are weighted
+    w = SID_WEIGHTS
+    if w is None:
+        return len(t)
+    if not isinstance(t, Tidlist):
+        return t.occ  # spade.diffset.DiffTidlist: kept by subtraction
+    return sum(w[k >> EID_BITS] for k in t.keys)
+
+
+def pack(sid: int, eid: int) -> int:
+    # one int64 per occurrence: sid in the high half, eid in the low half,
+    # so packed keys sort exactly like (sid, eid) tuples
+    if not (0 <= eid <= EID_MASK and 0 <= sid <= MAX_SID):
+        raise ValueError(f"(sid={sid}, eid={eid}) does not fit a packed tidlist key")
+    return (sid << EID_BITS) | eid
+
+
+def unpack(key: int) -> Tid:
+    return key >> EID_BITS, key & EID_MASK
+
+
+class Tidlist:
+    """
+    Columnar tidlist: a single array('q') of packed sid<<32|eid keys.
+    8 bytes per occurrence instead of a list of (sid, eid) tuples (~100 bytes).
+    Iterating / indexing still yields (sid, eid) pairs. Tidlists loaded from a
+    compiled file (spade.compiled) hold a read-only int64 memoryview instead.
+
+    Invariant: keys are strictly increasing, i.e. sorted by (sid, eid) without
+    duplicates. The vertical DB builders and the joins only produce such lists,
+    so joins trust it and never sort; Tidlist(keys) does not re-check it
+    (see assert_sorted / DEBUG_CHECKS).
+
+    sup caches the number of distinct sids; joins fill it while they build the
+    list, vertical.support() fills it on first use otherwise.
+    """
+    __slots__ = ("keys", "sup", "_first")
+
+    def __init__(self, keys: array | None = None, sup: int | None = None):
+        self.keys = keys if keys is not None else array("q")
+        self.sup = sup
+        self._first = None
+
+    @classmethod
+    def from_pairs(cls, pairs: Iterable[Tid]) -> Tidlist:
+        # the only constructor that establishes the invariant itself
+        return cls(array("q", sorted({pack(sid, eid) for sid, eid in pairs})))
+
+    def append(self, sid: int, eid: int) -> None:
+        # caller keeps the invariant: (sid, eid) must be greater than the last pair
+        self.keys.append(pack(sid, eid))
+        self.sup = None
+        self._first = None
+
+    def first_keys(self) -> array:
+        # s_join index, built on first use and kept until release_first()
+        if self._first is None:
+            self._first = first_keys(self.keys)
+        return self._first
+
+    def release_first(self) -> None:
+        self._first = None
+
+    def __reduce__(self):
+        # without the cached index; memoryview keys are copied out of their mapping
+        keys = self.keys if isinstance(self.keys, array) else array("q", self.keys)
+        return Tidlist, (keys, self.sup)
+
+    def is_sorted(self) -> bool:
+        k = self.keys
+        return all(x < y for x, y in zip(k, k[1:]))
+
+    def sids(self) -> Iterator[int]:
+        return (k >> EID_BITS for k in self.keys)
+
+    def nbytes(self) -> int:
+        return self.keys.itemsize * len(self.keys)
+
+    @property
+    def stored_len(self) -> int:
+        # occurrences held in memory (see spade.diffset.DiffTidlist)
+        return len(self.keys)
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def __iter__(self) -> Iterator[Tid]:
+        return (unpack(k) for k in self.keys)
+
+    def __getitem__(self, i: int) -> Tid:
+        return unpack(self.keys[i])
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, Tidlist):
+            return self.keys == other.keys
+        if isinstance(other, (list, tuple)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    __hash__ = None  # mutable, like the lists it replaces
+
+    def __repr__(self) -> str:
+        return f"Tidlist({list(self)!r})"
+
+
+def first_keys(keys: array) -> array:
+    """
+    First key of every sid of a sorted key array, in sid order: packed
+    (sid, min eid) pairs, i.e. sids and first eids as one compact array.
+    """
+    # reversed: the smallest key of each sid is written last and wins
+    first = list({k >> EID_BITS: k for k in reversed(keys)}.values())
+    first.reverse()
+    return array("q", first)
+
+
+def assert_sorted(*tidlists: Tidlist) -> None:
+    for t in tidlists:
+        if not t.is_sorted():
+            raise AssertionError(f"Tidlist violates the sorted (sid, eid) invariant: {t!r}")
@@ -1,25 +1,270 @@
 from __future__ import annotations
+from array import array
 from collections import defaultdict
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Set, Tuple
 from .io import Record
+from .stats import InputStats, input_stats_from_histograms
+from .tidlist import Tidlist, pack, EID_BITS, sids_weight
 
 Sid = int
 Eid = int
 Item = str
-Tid = Tuple[Sid, Eid]
-VerticalDB = Dict[Item, List[Tid]]
+VerticalDB = Dict[Item, Tidlist]
 
-def build_vertical_db(records: List[Record]) -> VerticalDB:
-    vdb: VerticalDB = defaultdict(list)
+READ_CHUNK = 1 << 22  # characters per buffered read in read_spmf_vertical
+
+def build_vertical_db(records: List[Record], keep: Optional[Set[Item]] = None) -> VerticalDB:
+    """
+    keep: projection on these items (see read_spmf_projected): other items are
+    dropped, events and sequences left empty are skipped, and sids / eids are
+    renumbered compactly. Records must then be sorted by (sid, eid), as
+    read_csv returns them.
+    """
+    keys: Dict[Item, List[int]] = defaultdict(list)
+    if keep is None:
+        for r in records:
+            k = pack(r.sid, r.eid)
+            for it in r.items:
+                keys[it].append(k)
+    else:
+        last_sid = None
+        sid = eid = 0
+        for r in records:
+            items = [it for it in r.items if it in keep]
+            if not items:
+                continue
+            if r.sid != last_sid:
+                last_sid = r.sid
+                sid += 1
+                eid = 0
+            eid += 1
+            k = pack(sid, eid)
+            for it in items:
+                keys[it].append(k)
+
+    # deterministic output
+    return {it: Tidlist(array("q", sorted(ks))) for it, ks in keys.items()}
+
+
+def record_supports(records: List[Record]) -> Dict[Item, int]:
+    # number of sids containing each item (first pass of a projected build)
+    sids: Dict[Item, Set[Sid]] = defaultdict(set)
     for r in records:
         for it in r.items:
-            vdb[it].append((r.sid, r.eid))
+            sids[it].add(r.sid)
+    return {it: len(s) for it, s in sids.items()}
 
-    # deterministic output
-    for it in vdb:
-        vdb[it].sort()
-    return dict(vdb)
 
-def support(tidlist: List[Tid]) -> int:
-    # number of distinct sids in the tidlist
-    return len({sid for sid, _ in tidlist})
+def _read_lines(path: str, chunk_size: int):
+    # lines of a text file read in large chunks
+    with open(path, "r", encoding="utf-8") as f:
+        tail = ""
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            lines = (tail + chunk).split("\n")
+            tail = lines.pop()
+            yield from lines
+        yield tail
+
+
+def count_spmf_items(path: str, chunk_size: int = READ_CHUNK) -> Tuple[Dict[Item, int], InputStats]:
+    """
+    First pass of read_spmf_projected: the number of sequences containing each
+    item and the InputStats of the whole file (same parsing rules as
+    read_spmf_vertical), without building any tidlist.
+    """
+    sup: Dict[Item, int] = {}
+    tx_per_seq: Dict[int, int] = {}
+    items_per_tx: Dict[int, int] = {}
+    seq_items: Set[Item] = set()
+    seq_events = 0
+
+    for line in _read_lines(path, chunk_size):
+        tokens = line.split()
+        if not tokens or tokens[0].startswith("#"):
+            continue
+
+        # fast path: one item per event, as in read_spmf_vertical
+        if not seq_events and len(tokens) % 2 == 1 and tokens[-1] == "-2":
+            items = tokens[0:-1:2]
+            if tokens[1::2].count("-1") == len(items) and "-1" not in items and "-2" not in items:
+                n = len(items)
+                if n:
+                    items_per_tx[1] = items_per_tx.get(1, 0) + n
+                    tx_per_seq[n] = tx_per_seq.get(n, 0) + 1
+                    for it in set(items):
+                        sup[it] = sup.get(it, 0) + 1
+                continue
+
+        current_event: List[Item] = []
+        for tok in tokens:
+            if tok != "-1" and tok != "-2":
+                current_event.append(tok)
+                continue
+            if current_event:
+                n = len(set(current_event))
+                items_per_tx[n] = items_per_tx.get(n, 0) + 1
+                seq_items.update(current_event)
+                seq_events += 1
+                current_event = []
+            if tok == "-2" and seq_events:
+                tx_per_seq[seq_events] = tx_per_seq.get(seq_events, 0) + 1
+                for it in seq_items:
+                    sup[it] = sup.get(it, 0) + 1
+                seq_items.clear()
+                seq_events = 0
+
+    # unterminated last sequence
+    if seq_events:
+        tx_per_seq[seq_events] = tx_per_seq.get(seq_events, 0) + 1
+        for it in seq_items:
+            sup[it] = sup.get(it, 0) + 1
+
+    return sup, input_stats_from_histograms(path, len(sup), tx_per_seq, items_per_tx)
+
+
+def read_spmf_projected(
+    path: str, minsup: int, chunk_size: int = READ_CHUNK
+) -> Tuple[VerticalDB, InputStats]:
+    """
+    Two-pass SPMF reader: counts item supports first (count_spmf_items), then
+    builds tidlists for the items with support >= minsup only. Events and
+    sequences left empty are dropped and eids / sids renumbered compactly, so
+    the frequent patterns (and their supports) are those of the full file.
+    InputStats describe the whole file, as with read_spmf_vertical.
+    """
+    sup, input_stats = count_spmf_items(path, chunk_size)
+    keep = {it for it, s in sup.items() if s >= minsup}
+    cols, _, _ = _read_spmf_columns(path, chunk_size, keep)
+    return {it: Tidlist(col) for it, col in cols.items()}, input_stats
+
+
+def read_spmf_vertical(path: str, chunk_size: int = READ_CHUNK) -> Tuple[VerticalDB, InputStats]:
+    """
+    Streaming SPMF reader: tokenizes the file in large chunks and appends every
+    event straight into per-item tidlists (no Record list, no global sort).
+
+    Same semantics as io.read_spmf + build_vertical_db:
+    - -1 ends an event, -2 ends a sequence (one sid per non-empty sequence)
+    - eids restart at 1 on every line, items inside an event are deduplicated
+    - eid must be strictly increasing within a sid (same check as io.validate)
+    Tidlists (packed sid<<32|eid columns) come out sorted by (sid, eid) because sids/eids only grow while reading.
+    """
+    cols, tx_per_seq, items_per_tx = _read_spmf_columns(path, chunk_size, None)
+    vdb: VerticalDB = {it: Tidlist(col) for it, col in cols.items()}
+    input_stats = input_stats_from_histograms(path, len(vdb), tx_per_seq, items_per_tx)
+    return vdb, input_stats
+
+
+def _read_spmf_columns(path: str, chunk_size: int, keep: Optional[Set[Item]]):
+    # read_spmf_vertical's parser; keep drops every other item before the
+    # event / sequence bookkeeping (empty events take no eid, empty sequences no sid)
+    cols: Dict[Item, array] = {}  # item -> packed sid<<32|eid keys
+    tx_per_seq: Dict[int, int] = {}
+    items_per_tx: Dict[int, int] = {}
+
+    sid = 1
+    last_eid = 0    # last eid emitted for the current sid
+    seq_events = 0  # events emitted for the current sid
+
+    with open(path, "r", encoding="utf-8") as f:
+        tail = ""
+        while True:
+            chunk = f.read(chunk_size)
+            if chunk:
+                lines = (tail + chunk).split("\n")
+                tail = lines.pop()
+            else:
+                lines = [tail]
+
+            for line in lines:
+                tokens = line.split()
+                if not tokens or tokens[0].startswith("#"):
+                    continue
+
+                # fast path: one item per event, "x -1 y -1 ... -1 -2" (bike, covid, msnbc)
+                if last_eid == 0 and len(tokens) % 2 == 1 and tokens[-1] == "-2":
+                    items = tokens[0:-1:2]
+                    if (
+                        tokens[1::2].count("-1") == len(items)
+                        and "-1" not in items
+                        and "-2" not in items
+                    ):
+                        if keep is not None:
+                            items = [it for it in items if it in keep]
+                        base = sid << EID_BITS
+                        for eid, it in enumerate(items, 1):
+                            col = cols.get(it)
+                            if col is None:
+                                cols[it] = array("q", (base | eid,))
+                            else:
+                                col.append(base | eid)
+                        n = len(items)
+                        if n:
+                            items_per_tx[1] = items_per_tx.get(1, 0) + n
+                            tx_per_seq[n] = tx_per_seq.get(n, 0) + 1
+                            sid += 1
+                        continue
+
+                current_event: List[Item] = []
+                eid = 1
+                had_any = False
+
+                for tok in tokens:
+                    if tok != "-1" and tok != "-2":
+                        current_event.append(tok)
+                        continue
+
+                    if current_event and keep is not None:
+                        current_event = [it for it in current_event if it in keep]
+                    if current_event:
+                        if eid <= last_eid:
+                            raise ValueError(
+                                f"Non-increasing eid for sid={sid}: {last_eid} -> {eid}"
+                            )
+                        last_eid = eid
+                        seq_events += 1
+                        if len(current_event) > 1:
+                            current_event = sorted(set(current_event))
+                        n = len(current_event)
+                        items_per_tx[n] = items_per_tx.get(n, 0) + 1
+                        key = (sid << EID_BITS) | eid
+                        for it in current_event:
+                            col = cols.get(it)
+                            if col is None:
+                                cols[it] = array("q", (key,))
+                            else:
+                                col.append(key)
+                        current_event = []
+                        had_any = True
+                        if tok == "-1":
+                            eid += 1
+
+                    if tok == "-2":
+                        # end sequence
+                        if had_any:
+                            tx_per_seq[seq_events] = tx_per_seq.get(seq_events, 0) + 1
+                            sid += 1
+                            last_eid = 0
+                            seq_events = 0
+                        eid = 1
+                        had_any = False
+
+            if not chunk:
+                break
+
+    # events of an unterminated last sequence still belong to a sid (as in io.read_spmf)
+    if seq_events:
+        tx_per_seq[seq_events] = tx_per_seq.get(seq_events, 0) + 1
+
+    return cols, tx_per_seq, items_per_tx
+
+def support(tidlist: Tidlist) -> int:
+    # number of distinct sids in the tidlist, weighted if sequences were
+    # deduplicated (cached on the Tidlist)
+    sup = tidlist.sup
+    if sup is None:
+        sup = tidlist.sup = sids_weight({k >> EID_BITS for k in tidlist.keys})
+    return sup
@@ -4,3 +4,8 @@ from pathlib import Path
 ROOT = Path(__file__).resolve().parents[1]
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
+
+from spade.tidlist import set_debug_checks
+
+# every join in the test suite verifies the sorted-tidlist invariant
+set_debug_checks(True)
@@ -0,0 +1,39 @@
+from spade.io import read_csv
+from spade.vertical import build_vertical_db
+from spade.f1 import frequent_items
+from spade.node import Node
+from spade.dspade import dspade
+from spade.bspade import bspade
+from spade.join import i_join, s_join, set_join_engine
+from spade.tidlist import Tidlist
+from spade.bitmap import BitmapLayout, to_bitmap_db
+from spade import bitmap
+
+def test_bitmap_joins_match_tidlist_joins():
+    import random
+    rng = random.Random(5)
+    for _ in range(200):
+        t1 = Tidlist.from_pairs({(rng.randint(1, 6), rng.randint(1, 8)) for _ in range(rng.randint(0, 20))})
+        t2 = Tidlist.from_pairs({(rng.randint(1, 6), rng.randint(1, 8)) for _ in range(rng.randint(0, 20))})
+        layout = BitmapLayout({sid: list(range(1, 9)) for sid in range(1, 7)})
+        b1, b2 = layout.encode(t1), layout.encode(t2)
+        for bm, ref in ((bitmap.i_join(b1, b2), i_join(t1, t2)),
+                        (bitmap.s_join(b1, b2), s_join(t1, t2))):
+            assert bm.bits == layout.encode(ref).bits
+            assert (len(bm), bm.sup) == (len(ref), ref.sup)
+
+def mine(alg, vdb):
+    f1 = frequent_items(vdb, minsup=2)
+    item_tidlists = {it: tl for (it, tl, _) in f1}
+    f1_nodes = [Node(pattern=((it,),), tidlist=tl) for (it, tl, _) in f1]
+    return [(n.pattern, n.sup, n.len_tidlist) for n in alg(f1_nodes, item_tidlists, minsup=2)]
+
+def test_bitmap_repr_mines_same_patterns():
+    vdb = build_vertical_db(read_csv("data/wyklad.csv"))
+    expected = {alg: mine(alg, vdb) for alg in (dspade, bspade)}
+    set_join_engine("bitmap")
+    try:
+        for alg in (dspade, bspade):
+            assert mine(alg, to_bitmap_db(vdb)) == expected[alg]
+    finally:
+        set_join_engine("python")
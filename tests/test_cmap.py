@@ -0,0 +1,24 @@
+from spade.io import read_csv
+from spade.vertical import build_vertical_db
+from spade.f1 import frequent_items
+from spade.node import Node
+from spade.dspade import dspade, StatsCounter
+from spade.bspade import bspade
+
+
+def test_cmap_pruning_keeps_the_same_patterns():
+    records = read_csv("data/wyklad.csv")
+    vdb = build_vertical_db(records)
+    f1 = frequent_items(vdb, minsup=2)
+    item_tidlists = {it: tl for (it, tl, _) in f1}
+    f1_nodes = [Node(pattern=((it,),), tidlist=tl) for (it, tl, _) in f1]
+
+    for alg in (dspade, bspade):
+        plain, pruned = StatsCounter(), StatsCounter()
+        expected = alg(f1_nodes, item_tidlists, minsup=2, stats=plain)
+        got = alg(f1_nodes, item_tidlists, minsup=2, stats=pruned, use_cmap=True)
+
+        assert [(n.pattern, n.sup) for n in got] == [(n.pattern, n.sup) for n in expected]
+        # every pruned candidate is a join the plain run attempted and dropped
+        assert pruned.total_pruned_cmap() > 0
+        assert pruned.total_attempted() + pruned.total_pruned_cmap() == plain.total_attempted()
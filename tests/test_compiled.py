@@ -0,0 +1,34 @@
+import pickle
+
+from spade.vertical import read_spmf_vertical
+from spade.compiled import compile_vdb, content_hash, load_vdb, read_vdb_meta
+from spade.f1 import frequent_items
+from spade.node import Node
+from spade.dspade import dspade
+
+SPMF = "1 2 -1 3 -1 1 -1 -2\n2 -1 1 3 -1 -2\n3 -1 3 -1 -2\n1 2 3 -1 2 -1 -2\n"
+
+
+def mine(vdb):
+    f1 = frequent_items(vdb, minsup=2)
+    f1_nodes = [Node(pattern=((it,),), tidlist=tl) for (it, tl, _) in f1]
+    return [(n.pattern, n.sup, n.tidlist.keys.tolist()) for n in dspade(f1_nodes, {}, minsup=2)]
+
+
+def test_compiled_vdb_round_trip(tmp_path):
+    src = tmp_path / "toy.spmf"
+    src.write_text(SPMF)
+    vdb, st = read_spmf_vertical(str(src))
+    out = tmp_path / "toy.vdb"
+    compile_vdb(vdb, st, content_hash(str(src)), str(out))
+
+    loaded, loaded_st = load_vdb(str(out))
+    assert loaded == vdb and loaded_st == st
+    assert isinstance(loaded["1"].keys, memoryview)  # zero-copy view of the mapping
+    assert read_vdb_meta(str(out))["source_sha256"] == content_hash(str(src))
+    assert mine(loaded) == mine(vdb)
+
+    # minsup: infrequent items are left out; views pickle as plain tidlists
+    frequent, _ = load_vdb(str(out), minsup=4)
+    assert sorted(frequent) == ["3"]
+    assert pickle.loads(pickle.dumps(frequent["3"])) == vdb["3"]
@@ -0,0 +1,41 @@
+from spade.vertical import read_spmf_vertical
+from spade.f1 import frequent_items
+from spade.node import Node
+from spade.dspade import dspade
+from spade.bspade import bspade
+from spade.dedup import dedup_sequences
+from spade.f2 import set_f2_method
+from spade.tidlist import set_sid_weights
+
+
+def mine(vdb, alg, minsup):
+    f1 = frequent_items(vdb, minsup=minsup)
+    item_tidlists = {it: tl for (it, tl, _) in f1}
+    f1_nodes = [Node(pattern=((it,),), tidlist=tl) for (it, tl, _) in f1]
+    return [(n.pattern, n.sup, n.len_tidlist) for n in alg(f1_nodes, item_tidlists, minsup=minsup)]
+
+
+def test_dedup_keeps_patterns_and_supports(tmp_path):
+    p = tmp_path / "dup.spmf"
+    p.write_text(
+        "1 2 -1 3 -1 1 -1 -2\n2 -1 1 3 -1 -2\n1 2 -1 3 -1 1 -1 -2\n"
+        "3 -1 3 -1 -2\n2 -1 1 3 -1 -2\n1 2 -1 3 -1 1 -1 -2\n1 2 3 -1 2 -1 -2\n"
+    )
+    vdb, _ = read_spmf_vertical(str(p))
+    dedup_vdb, weights = dedup_sequences(vdb)
+    assert list(weights) == [0, 3, 2, 1, 1]
+
+    for method in ("join", "horizontal"):
+        set_f2_method(method)
+        try:
+            for alg in (dspade, bspade):
+                for minsup in (1, 3, 4):
+                    expected = mine(vdb, alg, minsup)
+                    set_sid_weights(weights)
+                    try:
+                        got = mine(dedup_vdb, alg, minsup)
+                    finally:
+                        set_sid_weights(None)
+                    assert got == expected
+        finally:
+            set_f2_method("join")
@@ -20,3 +20,22 @@ def test_dspade_bspade_same_patterns():
 
     assert to_set(dfs_nodes) == to_set(bfs_nodes)
 
+
+def test_dspade_workers_match_serial():
+    from spade.dspade import StatsCounter
+
+    records = read_csv("data/wyklad.csv")
+    vdb = build_vertical_db(records)
+    f1 = frequent_items(vdb, minsup=2)
+    item_tidlists = {it: tl for (it, tl, _) in f1}
+    f1_nodes = [Node(pattern=((it,),), tidlist=tl) for (it, tl, _) in f1]
+
+    runs = []
+    for workers in (1, 2):
+        stats = StatsCounter()
+        nodes = dspade(f1_nodes, item_tidlists, minsup=2, stats=stats, workers=workers)
+        runs.append(([(n.pattern, n.sup, n.len_tidlist, n.stored_len) for n in nodes], vars(stats)))
+
+    assert runs[0] == runs[1]
+    # workers send back rows, not tidlists
+    assert not hasattr(nodes[-1], "tidlist")
@@ -0,0 +1,58 @@
+from spade.io import read_csv
+from spade.vertical import build_vertical_db, read_spmf_vertical
+from spade.f1 import frequent_items
+from spade.node import Node
+from spade.dspade import dspade, StatsCounter
+from spade.bspade import bspade
+from spade.dedup import dedup_sequences
+from spade.tidlist import set_sid_weights
+from spade.diffset import DiffTidlist
+
+def mine(alg, **kw):
+    vdb = build_vertical_db(read_csv("data/wyklad.csv"))
+    f1 = frequent_items(vdb, minsup=2)
+    item_tidlists = {it: tl for (it, tl, _) in f1}
+    f1_nodes = [Node(pattern=((it,),), tidlist=tl) for (it, tl, _) in f1]
+    stats = StatsCounter()
+    nodes = alg(f1_nodes, item_tidlists, minsup=2, stats=stats, **kw)
+    return nodes, stats
+
+def test_diffsets_mine_same_patterns():
+    for alg in (dspade, bspade):
+        plain, plain_stats = mine(alg)
+        # shrink ratio is always < 1: every class switches to diffsets
+        diff, diff_stats = mine(alg, diffset_threshold=1.0)
+
+        assert [(n.pattern, n.sup, n.len_tidlist) for n in diff] == \
+               [(n.pattern, n.sup, n.len_tidlist) for n in plain]
+        assert any(isinstance(n.tidlist, DiffTidlist) for n in diff)
+        for n, ref in zip(diff, plain):
+            assert n.tidlist.keys == ref.tidlist.keys
+        # STAT reports stored sizes
+        assert diff_stats.total_sum_tid_discovered() < plain_stats.total_sum_tid_discovered()
+        assert diff_stats.total_discovered() == plain_stats.total_discovered()
+
+def test_diffset_supports_by_subtraction_with_dedup(tmp_path):
+    p = tmp_path / "dup.spmf"
+    p.write_text(
+        "1 2 -1 1 2 3 -1 1 2 -1 -2\n1 2 3 -1 1 2 -1 -2\n1 2 -1 1 2 3 -1 1 2 -1 -2\n"
+        "1 2 3 -1 1 2 -1 -2\n2 -1 1 2 -1 3 -1 -2\n1 2 -1 1 2 3 -1 1 2 -1 -2\n"
+    )
+    vdb, _ = read_spmf_vertical(str(p))
+    dedup_vdb, weights = dedup_sequences(vdb)
+
+    def run(db, alg, **kw):
+        f1 = frequent_items(db, minsup=3)
+        item_tidlists = {it: tl for (it, tl, _) in f1}
+        f1_nodes = [Node(pattern=((it,),), tidlist=tl) for (it, tl, _) in f1]
+        return alg(f1_nodes, item_tidlists, minsup=3, **kw)
+
+    for alg in (dspade, bspade):
+        expected = [(n.pattern, n.sup) for n in run(vdb, alg)]
+        set_sid_weights(weights)
+        try:
+            got = run(dedup_vdb, alg, diffset_threshold=1.0)
+        finally:
+            set_sid_weights(None)
+        assert any(isinstance(n.tidlist, DiffTidlist) for n in got)
+        assert [(n.pattern, n.sup) for n in got] == expected
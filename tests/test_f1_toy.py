@@ -1,6 +1,7 @@
 from spade.io import read_csv
 from spade.vertical import build_vertical_db, support
 from spade.f1 import frequent_items
+from spade.tidlist import Tidlist
 
 def test_f1_toy_sup2():
     records = read_csv("data/wyklad.csv")
@@ -12,5 +13,5 @@ def test_f1_toy_sup2():
     assert got == {"A": 4, "B": 4, "D": 2, "F": 4}
 
 def test_support_counts_unique_sid():
-    tidlist = [(1, 10), (1, 20), (2, 15)]
+    tidlist = Tidlist.from_pairs([(1, 10), (1, 20), (2, 15)])
     assert support(tidlist) == 2
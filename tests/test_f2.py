@@ -0,0 +1,56 @@
+from spade.io import read_csv
+from spade.vertical import build_vertical_db
+from spade.f1 import frequent_items
+from spade.f2 import gen_f2
+from spade.dspade import StatsCounter
+
+def test_parallel_f2_matches_serial():
+    f1 = frequent_items(build_vertical_db(read_csv("data/wyklad.csv")), minsup=2)
+
+    runs = []
+    for workers in (1, 3):
+        stats = StatsCounter()
+        f2 = gen_f2(f1, minsup=2, stats=stats, workers=workers)
+        runs.append(([(p, tl.keys, sup) for (p, tl, sup) in f2], vars(stats)))
+
+    assert runs[0] == runs[1]
+    assert runs[0][1]["attempted_by_len"] == {1: 6, 2: 16}
+
+def test_horizontal_f2_matches_joins(tmp_path, monkeypatch):
+    from spade import join
+    from spade.f2 import set_f2_method, count_pairs
+    from spade.vertical import read_spmf_vertical
+
+    # rejected pairs count their exact length: so do abandoned joins in this mode
+    monkeypatch.setattr(join, "EXACT_ABANDONED_LEN", True)
+
+    p = tmp_path / "toy.spmf"
+    p.write_text("1 2 -1 3 -1 1 -1 -2\n2 -1 1 3 -1 -2\n3 -1 3 -1 -2\n1 2 3 -1 2 -1 -2\n")
+    f1 = frequent_items(read_spmf_vertical(str(p))[0], minsup=1)
+
+    for minsup in (1, 2, 3):
+        runs = []
+        for method in ("join", "horizontal"):
+            set_f2_method(method)
+            try:
+                stats = StatsCounter()
+                f2 = gen_f2(f1, minsup=minsup, stats=stats)
+            finally:
+                set_f2_method("join")
+            runs.append(([(pat, tl.keys, sup) for (pat, tl, sup) in f2], stats))
+
+        (ref, ref_stats), (got, got_stats) = runs
+        assert got == ref
+        assert got_stats.attempted_by_len == ref_stats.attempted_by_len
+        assert got_stats.sum_tid_attempted == ref_stats.sum_tid_attempted
+        # rejected pairs never reach a join
+        assert got_stats.total_abandoned() == 0
+
+    items = [it for (it, _, _) in f1]
+    i_count, s_count, i_len, s_len = count_pairs(items, {it: tl for (it, tl, _) in f1})
+    n = len(items)
+    assert s_count[items.index("3") * n + items.index("3")] == 1
+    assert i_count[items.index("1") * n + items.index("3")] == 2
+    # join lengths: <{3}->{3}> ends in one event (sid 2), <{1,3}> is one event of sids 1 and 3
+    assert s_len[items.index("3") * n + items.index("3")] == 1
+    assert i_len[items.index("1") * n + items.index("3")] == 2
@@ -0,0 +1,60 @@
+from spade.vertical import read_spmf_vertical
+from spade.items import encode_items
+from spade.f1 import frequent_items
+from spade.f2 import gen_f2, set_f2_method, set_pair_counts
+from spade.f2cache import cache_path, cached_pair_counts, load_pair_counts
+from spade.dspade import StatsCounter
+from spade.dedup import dedup_sequences
+from spade.tidlist import set_sid_weights
+
+
+def test_cached_counts_give_the_same_f2(tmp_path):
+    p = tmp_path / "toy.spmf"
+    p.write_text("1 2 -1 3 -1 1 -1 -2\n2 -1 1 3 -1 -2\n3 -1 3 -1 -2\n1 2 3 -1 2 -1 4 -1 -2\n")
+
+    for run in range(2):
+        vdb, labels = encode_items(read_spmf_vertical(str(p))[0])
+        counts, hit = cached_pair_counts(vdb, labels, str(p), "ab" * 32)
+        assert hit == (run > 0)  # the first run wrote the file
+        for minsup in (1, 2, 3):
+            f1 = frequent_items(vdb, minsup=minsup)
+            runs = []
+            for pair_counts in (None, counts):
+                set_f2_method("horizontal")
+                set_pair_counts(pair_counts)
+                try:
+                    stats = StatsCounter()
+                    f2 = gen_f2(f1, minsup=minsup, stats=stats)
+                finally:
+                    set_f2_method("join")
+                    set_pair_counts(None)
+                runs.append(([(pat, tl.keys, sup) for (pat, tl, sup) in f2], vars(stats)))
+            assert runs[0] == runs[1]
+
+    path = cache_path(str(p), "ab" * 32)
+    assert path.name == "toy.abababababababab.f2"
+    assert load_pair_counts(path, "ab" * 32).labels == ["1", "2", "3", "4"]
+    assert load_pair_counts(path, "cd" * 32) is None  # other content, same name prefix
+
+
+def test_dedup_runs_get_their_own_cache_file(tmp_path):
+    p = tmp_path / "dup.spmf"
+    p.write_text("1 2 -1 3 -1 -2\n1 2 -1 3 -1 -2\n2 -1 1 3 -1 -2\n")
+    vdb = read_spmf_vertical(str(p))[0]
+    full, full_labels = encode_items(vdb)
+    plain, hit = cached_pair_counts(full, full_labels, str(p), "ab" * 32)
+    assert not hit
+
+    dedup_vdb, weights = dedup_sequences(vdb)
+    codes, labels = encode_items(dedup_vdb)
+    set_sid_weights(weights)
+    try:
+        deduped, hit = cached_pair_counts(codes, labels, str(p), "ab" * 32, dedup=True)
+    finally:
+        set_sid_weights(None)
+    assert not hit  # the plain file is not reused
+    assert cache_path(str(p), "ab" * 32, dedup=True).name == "dup.abababababababab.dedup.f2"
+    # same weighted counts, deduplicated lengths
+    assert deduped.i_count == plain.i_count
+    assert list(deduped.i_len) != list(plain.i_len)
+    assert load_pair_counts(cache_path(str(p), "ab" * 32), "ab" * 32, dedup=True) is None
@@ -0,0 +1,85 @@
+import multiprocessing
+
+import pytest
+
+from spade.grid import GridConfig, estimate_cost, order_by_cost, run_configs
+from spade.naming import DataInfo, build_stat_name
+
+
+def _write_stat(d, info, cfg, cost):
+    lines = [f"alg: {cfg.alg}", f"sup: {cfg.sup}"]
+    if cfg.max_elts is not None:
+        lines.append(f"maxElts: {cfg.max_elts}")
+    lines.append(f"total_attempted_sum_tidlist_len: {cost}")
+    (d / build_stat_name(cfg.alg, info, cfg.sup, cfg.max_elts)).write_text("\n".join(lines) + "\n")
+
+
+def test_cost_from_earlier_stats(tmp_path):
+    info = DataInfo("toy", 4, 10, 5)
+    _write_stat(tmp_path, info, GridConfig("dspade", 3), 100)
+    _write_stat(tmp_path, info, GridConfig("dspade", 5), 40)
+    _write_stat(tmp_path, info, GridConfig("maxelts-dspade", 2, 2), 7)
+
+    assert estimate_cost(tmp_path, info, GridConfig("dspade", 3)) == 100
+    # no STAT at sup 2: nearest higher sup
+    assert estimate_cost(tmp_path, info, GridConfig("dspade", 2)) == 100
+    assert estimate_cost(tmp_path, info, GridConfig("dspade", 4)) == 40
+    assert estimate_cost(tmp_path, info, GridConfig("dspade", 6)) is None
+    assert estimate_cost(tmp_path, info, GridConfig("maxelts-dspade", 1, 2)) == 7
+    assert estimate_cost(tmp_path, info, GridConfig("maxelts-dspade", 1, 3)) is None
+    assert estimate_cost(tmp_path, DataInfo("toy", 5, 10, 5), GridConfig("dspade", 3)) is None
+
+
+def test_order_unknown_then_most_expensive():
+    a, b, c, d = GridConfig("dspade", 5), GridConfig("dspade", 2), GridConfig("bspade", 3), GridConfig("bspade", 9)
+    costs = {a: 10, b: 50, c: None, d: None}
+    assert order_by_cost([a, b, c, d], costs) == [c, d, b, a]
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_failure_does_not_stop_the_grid(tmp_path, jobs):
+    if jobs > 1 and "fork" not in multiprocessing.get_all_start_methods():
+        pytest.skip("needs fork")
+    configs = [GridConfig("dspade", s) for s in (1, 2, 3, 4)]
+
+    def run(cfg):
+        if cfg.sup == 2:
+            raise ValueError("boom")
+        (tmp_path / f"done_{cfg.sup}").write_text("")
+
+    failed = run_configs(configs, run, jobs=jobs, mem_budget=1, costs={c: c.sup for c in configs})
+    assert failed == [configs[1]]
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["done_1", "done_3", "done_4"]
+
+
+def test_memory_from_earlier_stats_else_default(tmp_path):
+    from spade.grid import estimate_mem
+
+    info = DataInfo("toy", 4, 10, 5)
+    cfg = GridConfig("dspade", 3)
+    _write_stat(tmp_path, info, cfg, 100)
+    assert estimate_mem(tmp_path, info, cfg) is None  # STAT without the key
+    path = tmp_path / build_stat_name("dspade", info, 3, None)
+    path.write_text(path.read_text() + "mine_peak_rss_bytes: 4096\n")
+    assert estimate_mem(tmp_path, info, cfg) == 4096
+    # no nearest-sup fallback: lower sups need more memory
+    assert estimate_mem(tmp_path, info, GridConfig("dspade", 2)) is None
+
+
+def test_unknown_configs_count_against_the_budget(tmp_path):
+    if "fork" not in multiprocessing.get_all_start_methods():
+        pytest.skip("needs fork")
+    import time
+    configs = [GridConfig("dspade", s) for s in (1, 2, 3)]
+    busy = tmp_path / "busy"
+
+    def run(cfg):
+        if busy.exists():
+            raise RuntimeError("two configurations at once")
+        busy.write_text("")
+        time.sleep(0.2)
+        busy.unlink()
+
+    # no history: each needs default_mem, two of them exceed the budget
+    failed = run_configs(configs, run, jobs=3, mem_budget=150, default_mem=100)
+    assert failed == []
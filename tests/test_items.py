@@ -0,0 +1,27 @@
+from spade.io import read_csv
+from spade.vertical import build_vertical_db
+from spade.f1 import frequent_items
+from spade.node import Node
+from spade.dspade import dspade
+from spade.items import encode_items
+from spade.pattern import format_pattern, set_item_labels
+
+def mine_formatted(vdb, minsup=2):
+    f1 = frequent_items(vdb, minsup=minsup)
+    item_tidlists = {it: tl for (it, tl, _) in f1}
+    f1_nodes = [Node(pattern=((it,),), tidlist=tl) for (it, tl, _) in f1]
+    return [(format_pattern(n.pattern), n.sup) for n in dspade(f1_nodes, item_tidlists, minsup=minsup)]
+
+def mine_encoded(vdb, minsup):
+    codes, labels = encode_items(vdb)
+    assert all(isinstance(it, int) for it in codes)
+    set_item_labels(labels)
+    try:
+        return mine_formatted(codes, minsup)
+    finally:
+        set_item_labels(None)
+
+def test_int_items_mine_same_output():
+    vdb = build_vertical_db(read_csv("data/wyklad.csv"))
+    for minsup in (1, 2):
+        assert mine_encoded(vdb, minsup) == mine_formatted(vdb, minsup)
@@ -1,16 +1,132 @@
 from spade.join import i_join, s_join
+from spade.tidlist import Tidlist
 
 def test_i_join_intersection():
-    t1 = [(1,10), (1,20), (2,10)]
-    t2 = [(1,20), (2,10), (2,15)]
+    t1 = Tidlist.from_pairs([(1,10), (1,20), (2,10)])
+    t2 = Tidlist.from_pairs([(1,20), (2,10), (2,15)])
     assert i_join(t1, t2) == [(1,20), (2,10)]
 
 def test_s_join_strictly_after():
     # t1: occurrences of prefix end event
-    t1 = [(1,10), (1,20), (2,5)]
+    t1 = Tidlist.from_pairs([(1,10), (1,20), (2,5)])
     # t2: occurrences of extension end event
-    t2 = [(1,10), (1,15), (1,25), (2,5), (2,6)]
+    t2 = Tidlist.from_pairs([(1,10), (1,15), (1,25), (2,5), (2,6)])
     # valid if exists eid1 < eid2 within same sid:
     # sid=1: for eid2=15 there is 10 < 15; for 25 there is 10/20 < 25
     # sid=2: for eid2=6 there is 5 < 6; eid2=5 is NOT allowed (must be strictly after)
     assert s_join(t1, t2) == [(1,15), (1,25), (2,6)]
+    # support is computed by the join and cached on the result
+    assert s_join(t1, t2).sup == 2
+
+def test_s_join_caches_first_keys_of_left_side():
+    t1 = Tidlist.from_pairs([(1,10), (1,20), (2,5), (4,1)])
+    t2 = Tidlist.from_pairs([(1,15), (2,5), (2,6), (3,9)])
+    assert s_join(t1, t2) == [(1,15), (2,6)]
+    first = t1.first_keys()
+    assert [(k >> 32, k & 0xFFFFFFFF) for k in first] == [(1,10), (2,5), (4,1)]
+    # reused by the next S-join with t1 on the left, dropped on release
+    s_join(t1, t1)
+    assert t1.first_keys() is first
+    t1.release_first()
+    assert t1.first_keys() is not first
+
+def test_tidlist_is_columnar():
+    tl = Tidlist.from_pairs([(1, 10), (1, 20), (70000, 3)])
+    assert tl.nbytes() == 8 * 3
+    assert list(tl) == [(1, 10), (1, 20), (70000, 3)]
+
+def test_numpy_engine_matches_python():
+    import random
+    import pytest
+    join_numpy = pytest.importorskip("spade.join_numpy")
+
+    rng = random.Random(7)
+    for _ in range(200):
+        t1 = Tidlist.from_pairs(sorted({(rng.randint(1, 6), rng.randint(1, 8)) for _ in range(rng.randint(0, 20))}))
+        t2 = Tidlist.from_pairs(sorted({(rng.randint(1, 6), rng.randint(1, 8)) for _ in range(rng.randint(0, 20))}))
+        for fast, ref in ((join_numpy.i_join(t1, t2), i_join(t1, t2)),
+                          (join_numpy.s_join(t1, t2), s_join(t1, t2))):
+            assert fast.keys == ref.keys
+            assert fast.sup == ref.sup == len({sid for sid, _ in ref})
+
+def test_joins_reject_unsorted_in_debug_mode():
+    from array import array
+    import pytest
+    from spade.tidlist import pack
+
+    good = Tidlist.from_pairs([(1, 1), (2, 1)])
+    bad = Tidlist(array("q", [pack(2, 1), pack(1, 1)]))
+    with pytest.raises(AssertionError):
+        s_join(bad, good)
+    with pytest.raises(AssertionError):
+        i_join(good, bad)
+
+def test_minsup_joins_match_full_joins(monkeypatch):
+    import random
+    from spade import join
+    from spade.join import i_join_minsup, s_join_minsup, INFREQUENT
+
+    monkeypatch.setattr(join, "ABANDON_CHUNK", 3)  # many early-abandon checks
+    monkeypatch.setattr(join, "GALLOP_STEPS", 2)  # S-join merge bisects past 2 sids
+    rng = random.Random(11)
+    for _ in range(300):
+        t1 = Tidlist.from_pairs({(rng.randint(1, 9), rng.randint(1, 6)) for _ in range(rng.randint(0, 25))})
+        t2 = Tidlist.from_pairs({(rng.randint(1, 9), rng.randint(1, 6)) for _ in range(rng.randint(0, 25))})
+        minsup = rng.randint(1, 6)
+        for bounded, full in ((i_join_minsup, i_join), (s_join_minsup, s_join)):
+            ref = full(t1, t2)
+            got = bounded(t1, t2, minsup)
+            if ref.sup >= minsup:
+                assert got.keys == ref.keys and got.sup == ref.sup
+            else:
+                assert got is INFREQUENT
+
+def test_join_len_matches_full_joins():
+    import random
+    from spade.join import i_join_len, s_join_len, abandoned_len
+
+    rng = random.Random(5)
+    for _ in range(300):
+        t1 = Tidlist.from_pairs({(rng.randint(1, 9), rng.randint(1, 6)) for _ in range(rng.randint(0, 25))})
+        t2 = Tidlist.from_pairs({(rng.randint(1, 9), rng.randint(1, 6)) for _ in range(rng.randint(0, 25))})
+        assert i_join_len(t1, t2) == len(i_join(t1, t2))
+        assert s_join_len(t1, t2) == len(s_join(t1, t2))
+        # what the STAT counts for abandoned joins by default
+        assert abandoned_len("I", t1, t2) >= i_join_len(t1, t2)
+        assert abandoned_len("S", t1, t2) >= s_join_len(t1, t2)
+
+def test_join_class_buckets_are_child_classes():
+    from spade.io import read_csv
+    from spade.vertical import build_vertical_db
+    from spade.f1 import frequent_items
+    from spade.node import Node
+    from spade.dspade import _f1_nodes_to_f2_nodes, _group_by_prefix
+    from spade.candidates import join_class, join_in_class
+    from spade.pattern_utils import split_last_step
+
+    f1 = frequent_items(build_vertical_db(read_csv("data/wyklad.csv")), minsup=1)
+    f1_nodes = [Node(pattern=((it,),), tidlist=tl) for (it, tl, _) in f1]
+    for cls in _group_by_prefix(_f1_nodes_to_f2_nodes(f1_nodes, 1)).values():
+        buckets = join_class(cls, minsup=1)
+        expected = {n.pattern for i in range(len(cls)) for j in range(i + 1, len(cls))
+                    for n in join_in_class(cls[i], cls[j], 1)}
+        assert {n.pattern for b in buckets for n in b} == expected
+        for parent, bucket in zip(cls, buckets):
+            assert all(split_last_step(n.pattern)[0] == parent.pattern for n in bucket)
+            assert bucket == sorted(bucket, key=lambda n: n.sort_key)
+
+def test_join_engines_are_the_accepted_names():
+    import importlib.util
+    import pytest
+    from spade import join
+
+    try:
+        for name in join.JOIN_ENGINES:
+            if name == "numpy" and importlib.util.find_spec("numpy") is None:
+                continue
+            join.set_join_engine(name)
+            assert join.ENGINE == name
+        with pytest.raises(ValueError, match="expected one of"):
+            join.set_join_engine("bogus")
+    finally:
+        join.set_join_engine("python")
@@ -39,3 +39,20 @@ def test_maxelts_cuts_long_patterns():
 
     mb2 = maxelts_bspade(f1_nodes, item_tidlists, minsup=2, max_elts=2)
     assert all(sum(len(ev) for ev in n.pattern) <= 2 for n in mb2)
+
+def test_maxelts_does_not_join_over_budget():
+    from spade.dspade import StatsCounter
+
+    f1_nodes, item_tidlists = prepare()
+    full = dspade(f1_nodes, item_tidlists, minsup=2)
+
+    for alg in (maxelts_dspade, maxelts_bspade):
+        attempted = []
+        for max_elts in (1, 2, 3):
+            stats = StatsCounter()
+            got = alg(f1_nodes, item_tidlists, minsup=2, max_elts=max_elts, stats=stats)
+            assert to_set(got) == {n.pattern for n in full if n.elts <= max_elts}
+            attempted.append(stats.total_attempted())
+        # max_elts=1: F1 only, no pair is joined
+        assert attempted[0] == len(f1_nodes)
+        assert attempted[0] < attempted[1] < attempted[2]
@@ -0,0 +1,27 @@
+import random
+from spade.pattern import format_pattern, set_item_labels
+from spade.pattern_utils import pattern_sort_key
+
+def random_patterns(rng, n):
+    return [tuple(tuple(sorted(rng.sample(range(n), rng.randint(1, 3))))
+                  for _ in range(rng.randint(1, 4)))
+            for _ in range(300)]
+
+def test_sort_key_matches_formatted_order():
+    rng = random.Random(3)
+    for _ in range(2):
+        # labels where one is a prefix of another ("30" / "301") are the hard case
+        labels = sorted({str(rng.choice([rng.randint(0, 40), rng.randint(0, 4000)])) for _ in range(25)})
+        pats = random_patterns(rng, len(labels))
+
+        set_item_labels(labels)
+        try:
+            expected = [format_pattern(p) for p in sorted(pats, key=format_pattern)]
+            got = [format_pattern(p) for p in sorted(pats, key=pattern_sort_key)]
+        finally:
+            set_item_labels(None)
+        assert got == expected
+
+        # label items without a registered table
+        named = [tuple(tuple(sorted(labels[i] for i in ev)) for ev in p) for p in pats]
+        assert sorted(named, key=pattern_sort_key) == sorted(named, key=format_pattern)
@@ -0,0 +1,48 @@
+import pytest
+from spade.io import read_spmf
+from spade.stats import compute_input_stats
+from spade.vertical import build_vertical_db, read_spmf_vertical
+
+SPMF = """# comment
+1 2 2 -1 3 -1 -2
+
+4 -1 1 -1 4 -1 -2
+-2
+3 1 -1 2 -1 -2
+"""
+
+def test_streaming_reader_matches_records(tmp_path):
+    p = tmp_path / "toy.spmf"
+    p.write_text(SPMF)
+
+    records = read_spmf(str(p))
+    vdb, st = read_spmf_vertical(str(p), chunk_size=5)  # tiny chunks: lines split across reads
+
+    assert vdb == build_vertical_db(records)
+    assert st == compute_input_stats(records, filename=str(p))
+
+def test_streaming_reader_rejects_reused_sid(tmp_path):
+    # a line without -2 leaves its sid open; the next line restarts eids at 1
+    p = tmp_path / "bad.spmf"
+    p.write_text("1 -1 2 -1\n3 -1 -2\n")
+
+    with pytest.raises(ValueError):
+        read_spmf_vertical(str(p))
+
+def test_projected_reader_keeps_frequent_items_only(tmp_path):
+    from spade.tidlist import unpack
+    from spade.vertical import read_spmf_projected, record_supports
+
+    p = tmp_path / "toy.spmf"
+    p.write_text(SPMF + "5 -1 6 -1 -2\n2 -1 5 -1 3 -1 -2\n")
+    records = read_spmf(str(p))
+
+    vdb, st = read_spmf_projected(str(p), minsup=3, chunk_size=5)
+    assert st == compute_input_stats(records, filename=str(p))
+    assert sorted(vdb) == ["1", "2", "3"]
+    # sequence "5 6" is dropped, events of 5 / 4 are removed and eids renumbered
+    assert [unpack(k) for k in vdb["3"].keys] == [(1, 2), (3, 1), (4, 2)]
+    assert [unpack(k) for k in vdb["1"].keys] == [(1, 1), (2, 1), (3, 1)]
+
+    keep = {it for it, sup in record_supports(records).items() if sup >= 3}
+    assert build_vertical_db(records, keep=keep) == vdb
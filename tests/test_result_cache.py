@@ -0,0 +1,50 @@
+import os
+
+from spade.result_cache import ResultCache, link_into, run_key
+
+
+def test_hits_need_same_key_and_untouched_files(tmp_path):
+    out, stat = tmp_path / "OUT_x.txt", tmp_path / "STAT_x.txt"
+    out.write_text("rows\n")
+    stat.write_text("sup: 3\n")
+    opts = {"diffsets": None}
+    key = run_key("ab" * 32, "dspade", 3, None, opts)
+    assert key != run_key("cd" * 32, "dspade", 3, None, opts)  # other content
+    assert key != run_key("ab" * 32, "dspade", 3, None, {"diffsets": 0.5})
+
+    cache = ResultCache(tmp_path / "manifest.json")
+    cache.record(key, out, stat)
+    cache.record("derived", out, stat, derived=True)
+    cache.save()
+
+    cache = ResultCache(tmp_path / "manifest.json")
+    assert cache.lookup(key) == (out.resolve(), stat.resolve())
+    assert cache.lookup("derived") is None
+    assert cache.lookup("derived", derived_ok=True) is not None
+
+    other = tmp_path / "other"
+    other.mkdir()
+    linked = link_into(out, other)
+    assert linked.read_text() == "rows\n" and linked.name == out.name
+    assert link_into(out, tmp_path) == out  # already in place
+
+    stat.write_text("sup: 4\n")
+    os.utime(stat, ns=(0, 0))
+    assert cache.lookup(key) is None
+
+
+def test_every_run_option_that_shows_in_results_is_in_the_key():
+    import argparse
+    from scripts.run_and_stat import add_run_options
+    from scripts.run_grid import _NOT_IN_RESULTS, _cache_options
+
+    ap = argparse.ArgumentParser()
+    add_run_options(ap)
+    base = ap.parse_args([])
+    for action in ap._actions:
+        if action.dest in ("help", *_NOT_IN_RESULTS):
+            continue
+        args = argparse.Namespace(**vars(base))
+        changed = [c for c in action.choices or () if c != action.default]
+        setattr(args, action.dest, changed[0] if changed else object())
+        assert _cache_options(args) != _cache_options(base), action.dest
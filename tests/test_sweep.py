@@ -0,0 +1,46 @@
+from spade.io import read_csv
+from spade.vertical import build_vertical_db
+from spade.f1 import frequent_items
+from spade.node import Node
+from spade.dspade import dspade, StatsCounter
+from spade.bspade import bspade
+from spade.maxelts_dspade import maxelts_dspade
+from spade.maxelts_bspade import maxelts_bspade
+from spade.sweep import SupSweep
+
+
+def _f1(vdb, minsup):
+    f1 = frequent_items(vdb, minsup=minsup)
+    return [Node(pattern=((it,),), tidlist=tl) for (it, tl, _) in f1], {it: tl for (it, tl, _) in f1}
+
+
+def test_higher_sups_are_filtered_from_the_lowest():
+    vdb = build_vertical_db(read_csv("data/wyklad.csv"))
+    algs = [
+        dspade, bspade,
+        lambda *a, **kw: maxelts_dspade(*a, max_elts=2, **kw),
+        lambda *a, **kw: maxelts_bspade(*a, max_elts=2, **kw),
+    ]
+    for alg in algs:
+        sweep = SupSweep([2, 3, 4])
+        rows = {1: [], 2: [], 3: [], 4: []}
+
+        def on_discover(n):
+            rows[1].append((n.pattern, n.sup))
+            for s in sweep.add(n):
+                rows[s].append((n.pattern, n.sup))
+
+        f1_nodes, item_tidlists = _f1(vdb, 1)
+        alg(f1_nodes, item_tidlists, minsup=1, on_discover=on_discover)
+
+        for s in (2, 3, 4):
+            stats = StatsCounter()
+            f1_nodes, item_tidlists = _f1(vdb, s)
+            expected = alg(f1_nodes, item_tidlists, minsup=s, stats=stats)
+            assert rows[s] == [(n.pattern, n.sup) for n in expected]
+            assert len(rows[s]) < len(rows[1])
+            derived = sweep.stats[s]
+            for name in ("candidates_by_len", "discovered_by_len", "sum_sup_cand",
+                         "sum_tid_cand", "sum_sup_disc", "sum_tid_disc"):
+                assert getattr(derived, name) == getattr(stats, name)
+            assert derived.max_discovered_len == stats.max_discovered_len